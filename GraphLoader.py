@@ -0,0 +1,151 @@
+import os
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from Problem import GraphProblem
+
+# bytes of text parsed at a time, whole lines are read so no edge is split
+BLOCK_BYTES = 1 << 22
+
+# lines starting with these are comments in edge list files
+COMMENTS = (b"#", b"%")
+
+
+def _number_blocks(filename: str, prefix: bytes = b"", skip: Tuple[bytes, ...] = COMMENTS) -> Iterator[np.ndarray]:
+    """
+    Reads a text file a block of lines at a time and parses the numbers on
+    the lines starting with prefix, with the prefix removed, in one call
+    per block. The blocks are flat float64 arrays.
+    """
+    with open(filename, "rb") as f:
+        while True:
+            lines = f.readlines(BLOCK_BYTES)
+            if not lines:
+                return
+            if prefix:
+                lines = [line[len(prefix):] for line in lines if line.startswith(prefix)]
+            else:
+                lines = [line for line in lines if line.strip() and not line.startswith(skip)]
+            if lines:
+                yield np.fromstring(b" ".join(lines).decode("ascii"), sep=" ")
+
+
+def _columns(blocks: List[np.ndarray], columns: int) -> np.ndarray:
+    if not blocks:
+        return np.zeros((0, columns))
+    return np.concatenate(blocks).reshape(-1, columns)
+
+
+def csr_from_edges(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray = None, vertices: int = None,
+                   directed: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds CSR arrays from parallel arrays of edges. Rows are sorted by
+    target and a repeated edge keeps its smallest weight.
+    :param sources: tail of every edge
+    :param targets: head of every edge
+    :param weights: cost of every edge, None if every edge costs 1
+    :param vertices: number of vertices, the largest id + 1 by default
+    :param directed: false to add the reverse of every edge
+    :return: (offsets, targets, weights) as taken by GraphProblem
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if not directed:
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        if weights is not None:
+            weights = np.concatenate([weights, weights])
+    if vertices is None:
+        vertices = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+    if len(sources) and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= vertices):
+        raise ValueError(f"Edge endpoints must be between 0 and {vertices - 1}")
+
+    # sorted by source, then target, then weight so the first of repeated edges is the cheapest
+    order = np.lexsort((targets, sources) if weights is None else (weights, targets, sources))
+    sources, targets = sources[order], targets[order]
+    keep = np.ones(len(sources), dtype=bool)
+    keep[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets = sources[keep], targets[keep]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[order][keep]
+
+    offsets = np.zeros(vertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=vertices), out=offsets[1:])
+    index = np.int32 if vertices < 2 ** 31 else np.int64
+    return offsets, targets.astype(index), weights
+
+
+def read_edge_list(filename: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads a whitespace separated edge list with one "source target [weight]"
+    line per edge and vertex ids starting at 0. Lines starting with # or %
+    are comments.
+    :return: (sources, targets, weights), weights is None without a third column
+    """
+    columns = None
+    with open(filename, "rb") as f:
+        for line in f:
+            if line.strip() and not line.startswith(COMMENTS):
+                columns = len(line.split())
+                break
+    if columns not in (None, 2, 3):
+        raise ValueError(f"{filename} has {columns} columns, expected source target [weight]")
+    edges = _columns(list(_number_blocks(filename)), columns or 2)
+    return (edges[:, 0].astype(np.int64), edges[:, 1].astype(np.int64),
+            edges[:, 2] if columns == 3 else None)
+
+
+def read_dimacs(filename: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Reads a DIMACS shortest path file, "p sp vertices arcs" followed by one
+    "a source target weight" line per arc with vertex ids starting at 1
+    :return: (sources, targets, weights, vertices) with ids starting at 0
+    """
+    vertices = None
+    with open(filename, "rb") as f:
+        for line in f:
+            if line.startswith(b"p "):
+                vertices = int(line.split()[2])
+                break
+    if vertices is None:
+        raise ValueError(f"{filename} has no problem line, is it a DIMACS .gr file?")
+    arcs = _columns(list(_number_blocks(filename, b"a ")), 3)
+    return arcs[:, 0].astype(np.int64) - 1, arcs[:, 1].astype(np.int64) - 1, arcs[:, 2], vertices
+
+
+def read_coordinates(filename: str, vertices: int) -> np.ndarray:
+    """
+    Reads a DIMACS coordinate file with one "v id x y" line per vertex
+    :return: (vertices, 2) array of positions
+    """
+    points = _columns(list(_number_blocks(filename, b"v ")), 3)
+    coordinates = np.zeros((vertices, 2))
+    coordinates[points[:, 0].astype(np.int64) - 1] = points[:, 1:]
+    return coordinates
+
+
+def load_graph(filename: str, initial: int = 0, goal: int = None, directed: bool = None,
+               coordinates: str = None) -> GraphProblem:
+    """
+    Loads a graph file into a GraphProblem. Files ending in .gr are read as
+    DIMACS, anything else as an edge list.
+    :param initial: vertex the search starts from
+    :param goal: vertex to reach, the last vertex by default
+    :param directed: edges only go one way, by default DIMACS arcs are
+    directed (both directions are listed) and edge lists are not
+    :param coordinates: DIMACS .co file with vertex positions for the heuristic
+    :return: problem whose other endpoints can be chosen with with_endpoints
+    """
+    if not os.path.exists(filename):
+        raise ValueError(f"Graph file {filename} does not exist")
+    if filename.lower().endswith(".gr"):
+        sources, targets, weights, vertices = read_dimacs(filename)
+        directed = True if directed is None else directed
+    else:
+        sources, targets, weights = read_edge_list(filename)
+        vertices = None
+        directed = False if directed is None else directed
+    offsets, targets, weights = csr_from_edges(sources, targets, weights, vertices, directed)
+    vertices = len(offsets) - 1
+    positions = read_coordinates(coordinates, vertices) if coordinates is not None else None
+    return GraphProblem(initial, vertices - 1 if goal is None else goal, offsets, targets, weights, positions)
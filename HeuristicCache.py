@@ -0,0 +1,202 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Sequence
+
+import numpy as np
+
+from Problem import Problem
+
+# rough bytes used by one cached entry besides its key: the ordered dict
+# slot and link plus the boxed heuristic value
+ENTRY_OVERHEAD = 120
+
+
+class HeuristicCache:
+    """
+    Memoizes the estimated_cost and estimated_cost_key methods of a problem
+    and their batched versions.
+    Results are kept in least recently used order and the oldest are evicted
+    once the estimated size of the cache passes max_bytes. Works for any
+    Problem subclass since it only wraps the methods of one instance.
+    """
+
+    def __init__(self, problem: Problem, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Creates the cache and attaches it to the problem
+        :param problem: problem whose heuristic is cached
+        :param max_bytes: memory budget of the cache in bytes
+        """
+        self._problem = problem
+        self._max_bytes = max_bytes
+        self._estimated_cost = problem.estimated_cost
+        self._estimated_cost_key = problem.estimated_cost_key
+        self._estimated_cost_key_from = problem.estimated_cost_key_from
+        # the default estimated_cost_key_from goes through estimated_cost_key, which is cached already
+        self._incremental = type(problem).estimated_cost_key_from is not Problem.estimated_cost_key_from
+        # states are keyed by hashable_state, keys from the successor interface by themselves
+        self._states = OrderedDict()
+        self._keys = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # depth of uncached heuristic calls in progress, see _compute
+        self._computing = 0
+        problem.estimated_cost = self.estimated_cost
+        problem.estimated_cost_key = self.estimated_cost_key
+        problem.estimated_cost_key_from = self.estimated_cost_key_from
+        self._estimated_costs = problem.estimated_costs
+        self._estimated_costs_key = problem.estimated_costs_key
+        problem.estimated_costs = self.estimated_costs
+        problem.estimated_costs_key = self.estimated_costs_key
+
+    def detach(self):
+        """Restores the uncached heuristic of the problem"""
+        del self._problem.estimated_cost
+        del self._problem.estimated_cost_key
+        del self._problem.estimated_cost_key_from
+        del self._problem.estimated_costs
+        del self._problem.estimated_costs_key
+
+    @property
+    def entries(self) -> int:
+        """number of cached heuristic values"""
+        return len(self._states) + len(self._keys)
+
+    @property
+    def hit_rate(self) -> float:
+        """fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _store(self, table: OrderedDict, key: Any, value: Any):
+        self.misses += 1
+        if key in table:
+            # replacing an entry must not count its size twice
+            self.size_bytes -= sys.getsizeof(key) + ENTRY_OVERHEAD
+        table[key] = value
+        self.size_bytes += sys.getsizeof(key) + ENTRY_OVERHEAD
+        while self.size_bytes > self._max_bytes and table:
+            old_key, _ = table.popitem(last=False)
+            self.size_bytes -= sys.getsizeof(old_key) + ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def _compute(self, compute, *args) -> Any:
+        """
+        Runs an uncached heuristic method. Some problems compute one heuristic
+        through another, e.g. estimated_cost through estimated_cost_key, and
+        their nested calls bypass the cache so an evaluation is counted and
+        stored once.
+        """
+        self._computing += 1
+        try:
+            return compute(*args)
+        finally:
+            self._computing -= 1
+
+    def estimated_cost(self, current: Any):
+        """
+        Cached version of the problem's estimated_cost
+        :param current: current state
+        :return: cost from current state to the goal
+        """
+        if self._computing:
+            return self._estimated_cost(current)
+        key = self._problem.hashable_state(current)
+        value = self._states.get(key)
+        if value is not None:
+            self._states.move_to_end(key)
+            self.hits += 1
+            return value
+        value = self._compute(self._estimated_cost, current)
+        self._store(self._states, key, value)
+        return value
+
+    def estimated_cost_key(self, key: Any):
+        """
+        Cached version of the problem's estimated_cost_key
+        :param key: key of the current state
+        :return: cost from current state to the goal
+        """
+        if self._computing:
+            return self._estimated_cost_key(key)
+        value = self._keys.get(key)
+        if value is not None:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return value
+        value = self._compute(self._estimated_cost_key, key)
+        self._store(self._keys, key, value)
+        return value
+
+    def estimated_cost_key_from(self, parent_key: Any, parent_cost: float, key: Any):
+        """
+        Cached version of the problem's estimated_cost_key_from
+        :param parent_key: key of the state the child was generated from
+        :param parent_cost: estimated cost of the parent
+        :param key: key of the child state
+        :return: cost from the child state to the goal
+        """
+        if self._computing:
+            return self._estimated_cost_key_from(parent_key, parent_cost, key)
+        value = self._keys.get(key)
+        if value is not None:
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return value
+        if self._incremental:
+            value = self._compute(self._estimated_cost_key_from, parent_key, parent_cost, key)
+        else:
+            value = self._compute(self._estimated_cost_key, key)
+        self._store(self._keys, key, value)
+        return value
+
+    def _batch(self, table: OrderedDict, keys: list, items: Sequence[Any], compute) -> np.ndarray:
+        """
+        Looks up every key and computes the misses with one call to compute
+        on the matching items. A key repeated in the batch is computed and
+        stored once, its later occurrences count as hits.
+        """
+        values = [table.get(key) for key in keys]
+        # index of the first occurrence of every missing key
+        misses = {}
+        for i, value in enumerate(values):
+            if value is None:
+                misses.setdefault(keys[i], i)
+            else:
+                table.move_to_end(keys[i])
+        self.hits += len(keys) - len(misses)
+        if misses:
+            computed = dict(zip(misses, self._compute(compute, [items[i] for i in misses.values()]).tolist()))
+            for key, value in computed.items():
+                self._store(table, key, value)
+            # read from computed, a small cache may already have evicted some of them
+            values = [computed[key] if value is None else value for key, value in zip(keys, values)]
+        return np.array(values)
+
+    def estimated_costs(self, states: Sequence[Any]) -> np.ndarray:
+        """
+        Cached version of the problem's estimated_costs, only the states
+        missing from the cache are passed on in one batch
+        :param states: sequence of states or a stacked array of states
+        :return: array with the cost from each state to the goal
+        """
+        if self._computing:
+            return self._estimated_costs(states)
+        keys = [self._problem.hashable_state(state) for state in states]
+        return self._batch(self._states, keys, states, self._estimated_costs)
+
+    def estimated_costs_key(self, keys: Sequence[Any]) -> np.ndarray:
+        """
+        Cached version of the problem's estimated_costs_key
+        :param keys: sequence of state keys
+        :return: array with the cost from each state to the goal
+        """
+        if self._computing:
+            return self._estimated_costs_key(keys)
+        keys = list(keys)
+        return self._batch(self._keys, keys, keys, self._estimated_costs_key)
+
+    def __str__(self) -> str:
+        return (f"Heuristic cache: {self.hits} hits, {self.misses} misses ({self.hit_rate:.1%}), "
+                f"{self.entries} entries, {self.size_bytes:.2e} bytes, {self.evictions} evictions")
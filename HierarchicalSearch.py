@@ -0,0 +1,231 @@
+import collections
+import heapq
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from Problem import MazeNavigation
+from SearchControl import *
+
+# abstractions already built, keyed by maze layout and cluster size
+_abstractions = {}
+
+# entrances at least this long get a transition at both ends instead of one in the middle
+LONG_ENTRANCE = 6
+
+MOVES = (("north", -1, 0), ("east", 0, 1), ("south", 1, 0), ("west", 0, -1))
+
+
+class ClusterAbstraction:
+    """
+    Abstract graph used by hierarchical pathfinding (HPA*). The maze is cut
+    into square clusters, every walkable opening between two clusters gets
+    one or two transitions, and the distances between the transitions of
+    each cluster are computed once. Queries search this small graph and only
+    refine the segments of the abstract path into cells.
+    """
+
+    def __init__(self, grid: np.ndarray, cluster_size: int = 10):
+        """
+        Builds the abstraction of a maze
+        :param grid: maze without the agent, 0s are impassable
+        :param cluster_size: width and height of each cluster in cells
+        """
+        self._height, self._width = grid.shape
+        self._size = cluster_size
+        self._walkable = (grid != 0).ravel().tolist()
+        # abstract node (cell index) -> {neighbor cell index: cost}
+        self._edges: Dict[int, Dict[int, float]] = collections.defaultdict(dict)
+        # cluster id -> abstract nodes inside it
+        self._cluster_nodes: Dict[Tuple[int, int], List[int]] = collections.defaultdict(list)
+        # refined cell paths between two nodes of one cluster
+        self._segments: Dict[Tuple[int, int], List[int]] = {}
+        self._build_entrances()
+        self._build_intra_edges()
+
+    def cluster(self, cell: int) -> Tuple[int, int]:
+        """returns the (row, col) id of the cluster containing the cell"""
+        row, col = divmod(cell, self._width)
+        return row // self._size, col // self._size
+
+    def _bounds(self, cluster: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        row0, col0 = cluster[0] * self._size, cluster[1] * self._size
+        return row0, min(row0 + self._size, self._height), col0, min(col0 + self._size, self._width)
+
+    def _add_transition(self, a: int, b: int):
+        for cell in (a, b):
+            nodes = self._cluster_nodes[self.cluster(cell)]
+            if cell not in nodes:
+                nodes.append(cell)
+        self._edges[a][b] = 1
+        self._edges[b][a] = 1
+
+    def _scan_border(self, pairs: List[Tuple[int, int]]):
+        """
+        Turns the cell pairs along one cluster border into transitions
+        """
+        segment = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and self._walkable[a] and self._walkable[b]:
+                segment.append((a, b))
+                continue
+            if segment:
+                if len(segment) >= LONG_ENTRANCE:
+                    self._add_transition(*segment[0])
+                    self._add_transition(*segment[-1])
+                else:
+                    self._add_transition(*segment[len(segment) // 2])
+                segment = []
+
+    def _build_entrances(self):
+        width, size = self._width, self._size
+        # borders between vertically adjacent clusters
+        for row in range(size, self._height, size):
+            for col0 in range(0, width, size):
+                cols = range(col0, min(col0 + size, width))
+                self._scan_border([((row - 1) * width + c, row * width + c) for c in cols])
+        # borders between horizontally adjacent clusters
+        for col in range(size, width, size):
+            for row0 in range(0, self._height, size):
+                rows = range(row0, min(row0 + size, self._height))
+                self._scan_border([(r * width + col - 1, r * width + col) for r in rows])
+
+    def _local_search(self, start: int, bounds: Tuple[int, int, int, int]) -> dict:
+        """
+        Breadth first search from start that stays inside the bounds
+        :return: dictionary mapping each reached cell to its parent cell
+        """
+        row0, row1, col0, col1 = bounds
+        width = self._width
+        parents = {start: None}
+        frontier = collections.deque([start])
+        while frontier:
+            cell = frontier.popleft()
+            row, col = divmod(cell, width)
+            for _, d_row, d_col in MOVES:
+                next_row, next_col = row + d_row, col + d_col
+                if row0 <= next_row < row1 and col0 <= next_col < col1:
+                    next_cell = next_row * width + next_col
+                    if next_cell not in parents and self._walkable[next_cell]:
+                        parents[next_cell] = cell
+                        frontier.append(next_cell)
+        return parents
+
+    @staticmethod
+    def _cells_to(parents: dict, cell: int) -> List[int]:
+        cells = []
+        while cell is not None:
+            cells.append(cell)
+            cell = parents[cell]
+        cells.reverse()
+        return cells
+
+    def _connect(self, node: int, edges: dict, segments: dict, extra: List[int] = ()):
+        """
+        Adds the intra cluster edges from node to every reachable node of
+        its cluster and to the extra nodes, with the cells of each edge
+        """
+        cluster = self.cluster(node)
+        parents = self._local_search(node, self._bounds(cluster))
+        for other in self._cluster_nodes[cluster] + list(extra):
+            if other != node and other in parents:
+                cells = self._cells_to(parents, other)
+                edges[node][other] = len(cells) - 1
+                edges[other][node] = len(cells) - 1
+                segments[(node, other)] = cells
+                segments[(other, node)] = cells[::-1]
+
+    def _build_intra_edges(self):
+        for nodes in list(self._cluster_nodes.values()):
+            for node in nodes:
+                self._connect(node, self._edges, self._segments)
+
+    def find_path(self, start: int, goal: int, limits: SearchLimits = None) -> Any:
+        """
+        Returns the cells of a path from start to goal, or None if there is none
+        :param start: cell index of the start
+        :param goal: cell index of the goal
+        """
+        if start == goal:
+            return [start]
+
+        # temporary edges that connect start and goal to their clusters
+        edges = collections.defaultdict(dict)
+        segments = {}
+        for node in (start, goal):
+            self._connect(node, edges, segments, [start, goal])
+
+        def neighbors(node):
+            yield from self._edges.get(node, {}).items()
+            yield from edges.get(node, {}).items()
+
+        goal_row, goal_col = divmod(goal, self._width)
+
+        def h(node):
+            row, col = divmod(node, self._width)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        g = {start: 0}
+        parent = {start: None}
+        frontier = [(h(start), 0, start)]
+        entry = 1
+        while frontier:
+            f, _, node = heapq.heappop(frontier)
+            if node == goal:
+                break
+            if f > g[node] + h(node):
+                continue  # stale entry
+            if limits is not None:
+                limits.check()
+            for other, cost in neighbors(node):
+                if g[node] + cost < g.get(other, float("inf")):
+                    g[other] = g[node] + cost
+                    parent[other] = node
+                    heapq.heappush(frontier, (g[other] + h(other), entry, other))
+                    entry += 1
+        if goal not in parent:
+            return None
+
+        # refine the abstract path, transitions between clusters are single steps
+        nodes = self._cells_to(parent, goal)
+        cells = [start]
+        for a, b in zip(nodes, nodes[1:]):
+            segment = segments.get((a, b)) or self._segments.get((a, b))
+            cells.extend(segment[1:] if segment is not None else [b])
+        return cells
+
+    def actions(self, cells: List[int]) -> List[str]:
+        """turns a list of adjacent cells into the actions that walk it"""
+        names = {d_row * self._width + d_col: name for name, d_row, d_col in MOVES}
+        return [names[b - a] for a, b in zip(cells, cells[1:])]
+
+
+def get_abstraction(problem: MazeNavigation, cluster_size: int = 10) -> ClusterAbstraction:
+    """
+    Returns the cluster abstraction of the problem's maze, building it only
+    the first time a maze with this layout is seen
+    """
+    grid = problem.grid
+    key = (grid.shape, cluster_size, grid.tobytes())
+    if key not in _abstractions:
+        _abstractions[key] = ClusterAbstraction(grid, cluster_size)
+    return _abstractions[key]
+
+
+def hpa_star(problem: MazeNavigation, cluster_size: int = 10, limits: SearchLimits = None) -> Any:
+    """
+    Takes in a MazeNavigation problem and performs hierarchical pathfinding
+    (HPA*) on the cached cluster abstraction of its maze. Paths are near
+    optimal: they pass through cluster transitions. Returns and empty list
+    if no path is found.
+    """
+    if limits is not None:
+        limits.start()
+    abstraction = get_abstraction(problem, cluster_size)
+    try:
+        cells = abstraction.find_path(problem.state_key(problem.initial), problem.state_key(problem.goal), limits)
+    except SearchInterrupted as e:
+        return limits.result(e.status, [])
+    if cells is None:
+        return no_path(limits)  # no path found
+    return solved(limits, abstraction.actions(cells))
@@ -0,0 +1,178 @@
+import heapq
+from typing import Any, Dict, List
+
+import numpy as np
+
+from Problem import MazeNavigation
+from SearchControl import *
+
+MOVES = (("north", -1, 0), ("east", 0, 1), ("south", 1, 0), ("west", 0, -1))
+
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite) for MazeNavigation mazes whose cells
+    change between queries. The search runs backwards from the goal and
+    keeps its g and rhs values, so after a batch of cell updates only the
+    states whose distance to the goal changed are repaired instead of
+    searching the whole maze again. The agent may also move between
+    queries without losing that work.
+    """
+
+    def __init__(self, problem: MazeNavigation):
+        """
+        Creates the planner for the maze, start and goal of the problem
+        :param problem: maze navigation problem
+        """
+        self._grid = np.copy(problem.grid)
+        self._height, self._width = self._grid.shape
+        self._walkable = (self._grid != 0).ravel().tolist()
+        self._start = problem.state_key(problem.initial)
+        self._goal = problem.state_key(problem.goal)
+        self._km = 0
+        self._g: Dict[int, float] = {}
+        self._rhs: Dict[int, float] = {self._goal: 0}
+        self._queue = []
+        self._queued: Dict[int, tuple] = {}
+        self.expanded = 0
+        self._push(self._goal)
+
+    @property
+    def grid(self) -> np.ndarray:
+        """current maze without the agent"""
+        return self._grid
+
+    @property
+    def start(self) -> int:
+        """cell index the agent plans from"""
+        return self._start
+
+    def _h(self, cell: int) -> int:
+        row, col = divmod(cell, self._width)
+        start_row, start_col = divmod(self._start, self._width)
+        return abs(row - start_row) + abs(col - start_col)
+
+    def _key(self, cell: int) -> tuple:
+        best = min(self._g.get(cell, float("inf")), self._rhs.get(cell, float("inf")))
+        return best + self._h(cell) + self._km, best
+
+    def _push(self, cell: int):
+        key = self._key(cell)
+        self._queued[cell] = key
+        heapq.heappush(self._queue, (key, cell))
+
+    def _neighbors(self, cell: int):
+        row, col = divmod(cell, self._width)
+        for action, d_row, d_col in MOVES:
+            next_row, next_col = row + d_row, col + d_col
+            if 0 <= next_row < self._height and 0 <= next_col < self._width:
+                yield action, next_row * self._width + next_col
+
+    def _cost(self, a: int, b: int) -> float:
+        # all walkable tiles cost 1 like MazeNavigation._action_cost
+        return 1 if self._walkable[a] and self._walkable[b] else float("inf")
+
+    def _update_vertex(self, cell: int):
+        infinity = float("inf")
+        if cell != self._goal:
+            self._rhs[cell] = min((self._cost(cell, n) + self._g.get(n, infinity) for _, n in self._neighbors(cell)),
+                                  default=infinity)
+        self._queued.pop(cell, None)
+        if self._g.get(cell, infinity) != self._rhs.get(cell, infinity):
+            self._push(cell)
+
+    def _top(self) -> Any:
+        # drop entries that were replaced or removed
+        while self._queue and self._queued.get(self._queue[0][1]) != self._queue[0][0]:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    def _compute_shortest_path(self, limits: SearchLimits = None):
+        infinity = float("inf")
+        while True:
+            top = self._top()
+            start_key = self._key(self._start)
+            if top is None or (top[0] >= start_key and
+                               self._rhs.get(self._start, infinity) == self._g.get(self._start, infinity)):
+                return
+            old_key, cell = heapq.heappop(self._queue)
+            del self._queued[cell]
+            if limits is not None:
+                limits.check()
+            self.expanded += 1
+
+            new_key = self._key(cell)
+            g, rhs = self._g.get(cell, infinity), self._rhs.get(cell, infinity)
+            if old_key < new_key:
+                self._push(cell)
+            elif g > rhs:
+                self._g[cell] = rhs
+                for _, n in self._neighbors(cell):
+                    self._update_vertex(n)
+            else:
+                self._g[cell] = infinity
+                self._update_vertex(cell)
+                for _, n in self._neighbors(cell):
+                    self._update_vertex(n)
+
+    def plan(self, limits: SearchLimits = None) -> Any:
+        """
+        Repairs the search after any updates and returns the actions of a
+        shortest path from the current start to the goal, or an empty list
+        if the goal cannot be reached
+        """
+        if limits is not None:
+            limits.start()
+        try:
+            self._compute_shortest_path(limits)
+        except SearchInterrupted as e:
+            return limits.result(e.status, [])
+
+        infinity = float("inf")
+        if self._g.get(self._start, infinity) == infinity:
+            return no_path(limits)  # no path found
+        path = []
+        cell = self._start
+        while cell != self._goal:
+            action, cell = min(((a, n) for a, n in self._neighbors(cell)),
+                               key=lambda an: self._cost(cell, an[1]) + self._g.get(an[1], infinity))
+            path.append(action)
+        return solved(limits, path)
+
+    def update_cells(self, changes: Dict[Any, float]):
+        """
+        Applies a batch of cell changes, e.g. {(row, col): 0} to block a
+        cell or {(row, col): 1} to open it. The plan is repaired on the next call to plan.
+        :param changes: new values keyed by (row, col) or flat cell index
+        """
+        touched = set()
+        for cell, value in changes.items():
+            if isinstance(cell, tuple):
+                cell = cell[0] * self._width + cell[1]
+            self._grid.flat[cell] = value
+            self._walkable[cell] = value != 0
+            touched.add(cell)
+            touched.update(n for _, n in self._neighbors(cell))
+        for cell in touched:
+            self._update_vertex(cell)
+
+    def move_start(self, cell: Any):
+        """
+        Moves the agent to a new cell, keeping the search values valid
+        :param cell: (row, col) or flat cell index of the new start
+        """
+        if isinstance(cell, tuple):
+            cell = cell[0] * self._width + cell[1]
+        # keys already queued were computed for the old start, so every
+        # key grows by how much the heuristic may have dropped
+        self._km += self._h(cell)
+        self._start = cell
+
+
+def d_star_lite(problem: MazeNavigation, limits: SearchLimits = None) -> Any:
+    """
+    Takes in a MazeNavigation problem and plans once with D* Lite. Keep a
+    DStarLite object instead to replan cheaply after the maze changes.
+    Returns and empty list if no path is found.
+    """
+    return DStarLite(problem).plan(limits)
@@ -1,6 +1,8 @@
 import collections
+import heapq
 
 from Problem import *
+from SearchControl import *
 from queue import PriorityQueue
 
 
@@ -18,61 +20,525 @@ def get_path(node: Node) -> List[str]:
     return p
 
 
-def a_star(problem: Problem) -> Any:
+def get_key_path(reached: dict, key: Any) -> List[str]:
+    """
+    Takes in a reached table that maps each state key to a tuple starting
+    with (parent key, action) and returns the list of actions from the root,
+    whose parent key is None, to the given key.
+    """
+    p = []
+    entry = reached[key]
+    while entry[0] is not None:
+        p.append(entry[1])
+        entry = reached[entry[0]]
+    p.reverse()
+    return p
+
+
+def _best_first_search_keys(problem: Problem, use_path_cost: bool, limits: SearchLimits = None) -> Any:
+    """
+    A* (use_path_cost) or Greedy Search over the successor interface. The
+    reached table maps each key to (parent key, action, path cost) and the
+    heuristic is computed from keys, so children are never built as Node
+    objects or full states. The children kept by an expansion are scored
+    with one estimated_costs_key call unless the problem updates estimates
+    incrementally with estimated_cost_key_from. With a checkpoint in the
+    limits the frontier, reached table and counters are snapshotted between
+    expansions.
+    """
+    key = problem.state_key(problem.initial)
+    entry = 0
+    if problem.is_goal_key(key):
+        return solved(limits, [])
+    search = "a_star" if use_path_cost else "greedy"
+    checkpoint = limits.checkpoint if limits is not None else None
+    resumed = checkpoint.resume(search, problem) if checkpoint is not None else None
+    frontier = PriorityQueue()
+    if resumed is not None:
+        # the saved list is already a heap with the original tie breaking entries
+        frontier.queue = resumed["frontier"]
+        reached = resumed["reached"]
+        entry, best, best_h = resumed["entry"], resumed["best"], resumed["best_h"]
+        limits.nodes_expanded = resumed["nodes_expanded"]
+    else:
+        best_h = problem.estimated_cost_key(key)
+        best = key
+        frontier.put((best_h, entry, key, 0))
+        entry += 1
+        reached = {key: (None, None, 0)}
+    # problems that update a parent's estimate per child keep doing so, the others score the children in a batch
+    incremental = type(problem).estimated_cost_key_from is not Problem.estimated_cost_key_from
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
+    while not frontier.empty():
+        if checkpoint is not None and checkpoint.due(limits.nodes_expanded):
+            checkpoint.save(search, problem, frontier=frontier.queue, reached=reached, entry=entry, best=best,
+                            best_h=best_h, nodes_expanded=limits.nodes_expanded)
+        item = frontier.get()
+        f, _, key, g = item
+        h_key = f - g if use_path_cost else f
+        if g > reached[key][2]:
+            continue  # a cheaper path to this state was queued later
+        if problem.is_goal_key(key):
+            return solved(limits, get_key_path(reached, key))
+        if limits is not None and limits.expanded() is not None:
+            if checkpoint is not None:
+                # the node was not expanded, so it is queued again
+                frontier.put(item)
+                checkpoint.save(search, problem, wait=True, frontier=frontier.queue, reached=reached, entry=entry,
+                                best=best, best_h=best_h, nodes_expanded=limits.nodes_expanded)
+            return limits.result(limits.status, [], get_key_path(reached, best))
+        children = []
+        for action, child, cost in problem.successors(key):
+            child_g = g + cost
+            if child not in reached or child_g < reached[child][2]:
+                reached[child] = (key, action, child_g)
+                children.append((child, child_g))
+        if not children:
+            continue
+        if incremental:
+            costs = [problem.estimated_cost_key_from(key, h_key, child) for child, _ in children]
+        else:
+            # one heuristic call for all the children that were kept
+            costs = problem.estimated_costs_key([child for child, _ in children]).tolist()
+        for (child, child_g), h in zip(children, costs):
+            if h < best_h:
+                best_h, best = h, child
+            frontier.put((child_g + h if use_path_cost else h, entry, child, child_g))
+            entry += 1
+
+    return no_path(limits)  # failure
+
+
+def a_star(problem: Problem, limits: SearchLimits = None) -> Any:
     """
     Takes in a Problem object that has an initial and goal state as
     well as search operators (methods). Performs A*
     and returns the path found. Returns and empty list is no path is found.
+    If limits are given a SearchResult is returned whose best_so_far leads
+    to the state with the lowest estimated cost.
     """
+    if limits is not None:
+        limits.start()
+    if problem.supports_successors:
+        return _best_first_search_keys(problem, True, limits)
+    if limits is not None and limits.checkpoint is not None:
+        raise ValueError("Checkpoints need a problem with the successor interface")
     node = Node(problem.initial)
     entry = 0
     if problem.is_goal(node.state):
-        return node
+        return solved(limits, get_path(node))
+    best_h = problem.estimated_cost(node.state)
+    best = node
     frontier = PriorityQueue()
-    frontier.put((node.path_cost + problem.estimated_cost(node.state), entry, node))
+    frontier.put((node.path_cost + best_h, entry, node))
     entry += 1
     reached = {problem.hashable_state(problem.initial): node}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
     while not frontier.empty():
         node = frontier.get()[2]
         if problem.is_goal(node.state):
-            return get_path(node)
+            return solved(limits, get_path(node))
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(best))
         for child_node in problem.expand(node):
             state = child_node.state
 
             s = problem.hashable_state(state)
             if s not in reached or child_node.path_cost < reached[s].path_cost:
                 reached[s] = child_node
-                frontier.put((node.path_cost + problem.estimated_cost(child_node.state), entry, child_node))
+                h = problem.estimated_cost(child_node.state)
+                if h < best_h:
+                    best_h, best = h, child_node
+                frontier.put((child_node.path_cost + h, entry, child_node))
                 entry += 1
 
-    return [] # failure
+    return no_path(limits)  # failure
 
 
-def greedy(problem: Problem) -> Any:
+def greedy(problem: Problem, limits: SearchLimits = None) -> Any:
     """
     Takes in a Problem object that has an initial and goal state as
     well as search operators (methods). Performs a Greedy Search
     and returns the path found. Returns and empty list is no path is found.
+    If limits are given a SearchResult is returned whose best_so_far leads
+    to the state with the lowest estimated cost.
     """
+    if limits is not None:
+        limits.start()
+    if problem.supports_successors:
+        return _best_first_search_keys(problem, False, limits)
+    if limits is not None and limits.checkpoint is not None:
+        raise ValueError("Checkpoints need a problem with the successor interface")
     node = Node(problem.initial)
     entry = 0
     if problem.is_goal(node.state):
-        return node
+        return solved(limits, get_path(node))
+    best_h = problem.estimated_cost(node.state)
+    best = node
     frontier = PriorityQueue()
-    frontier.put((problem.estimated_cost(node.state), entry, node))
+    frontier.put((best_h, entry, node))
     entry += 1
     reached = {problem.hashable_state(problem.initial): node}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
     while not frontier.empty():
         node = frontier.get()[2]
         if problem.is_goal(node.state):
-            return get_path(node)
+            return solved(limits, get_path(node))
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(best))
         for child_node in problem.expand(node):
             state = child_node.state
 
             s = problem.hashable_state(state)
             if s not in reached or child_node.path_cost < reached[s].path_cost:
                 reached[s] = child_node
-                frontier.put((problem.estimated_cost(child_node.state), entry, child_node))
+                h = problem.estimated_cost(child_node.state)
+                if h < best_h:
+                    best_h, best = h, child_node
+                frontier.put((h, entry, child_node))
                 entry += 1
 
-    return []  # failure
\ No newline at end of file
+    return no_path(limits)  # failure
+
+def _weighted_entries(problem: Problem, nodes: dict, h: dict, keys, weight: float) -> PriorityQueue:
+    """
+    Builds a new frontier for the given keys ordered by g + weight * h
+    """
+    frontier = PriorityQueue()
+    for entry, s in enumerate(keys):
+        node = nodes[s]
+        frontier.put((node.path_cost + weight * h[s], entry, node))
+    return frontier
+
+
+def anytime_a_star(problem: Problem, weights=(3.0, 2.0, 1.5, 1.25, 1.0), limits: SearchLimits = None) -> Any:
+    """
+    Takes in a Problem object that has an initial and goal state as
+    well as search operators (methods). Performs Anytime Repairing A*
+    (ARA*). The first search inflates the heuristic by the largest weight
+    to find a path quickly, then every following weight improves on it
+    while reusing the g values found so far. States whose cost improves
+    after they were expanded are kept aside and only reopened for the next
+    weight. This is a generator that yields (path, bound) every time a
+    better path is found, where the path cost is at most bound times the
+    optimal cost. Nothing is yielded if no path exists. If limits are
+    given the generator stops as soon as one is reached, leaving the
+    status in limits.status.
+    """
+    if limits is not None:
+        limits.start()
+    goal_key = problem.hashable_state(problem.goal)
+    start_key = problem.hashable_state(problem.initial)
+    node = Node(problem.initial)
+    if start_key == goal_key:
+        yield [], 1.0
+        return
+
+    nodes = {start_key: node}  # best node found for each state
+    h = {start_key: problem.estimated_cost(node.state)}
+    opened = {start_key}  # states waiting in the frontier
+    incons = set()  # improved states that were already expanded this round
+    best_cost = float("inf")
+    best_bound = float("inf")
+    entry = 0
+
+    for weight in weights:
+        opened |= incons
+        incons = set()
+        closed = set()
+        frontier = _weighted_entries(problem, nodes, h, opened, weight)
+        if limits is not None:
+            limits.track(nodes=nodes, heuristic=h, frontier=frontier)
+        entry = len(opened)
+
+        while not frontier.empty():
+            f, _, node = frontier.queue[0]
+            s = problem.hashable_state(node.state)
+            if nodes[s] is not node or s in closed:
+                frontier.get()  # stale entry
+                continue
+            if goal_key in nodes and nodes[goal_key].path_cost <= f:
+                break
+            frontier.get()
+            if limits is not None and limits.expanded() is not None:
+                return
+            opened.discard(s)
+            closed.add(s)
+
+            children = []
+            for child_node in problem.expand(node):
+                c = problem.hashable_state(child_node.state)
+                if c in nodes and nodes[c].path_cost <= child_node.path_cost:
+                    continue
+                nodes[c] = child_node
+                children.append((c, child_node))
+            unseen = [(c, child_node) for c, child_node in children if c not in h]
+            if unseen:
+                costs = problem.estimated_costs([child_node.state for _, child_node in unseen]).tolist()
+                for (c, _), value in zip(unseen, costs):
+                    h[c] = value
+
+            for c, child_node in children:
+                if c in closed:
+                    incons.add(c)
+                else:
+                    opened.add(c)
+                    frontier.put((child_node.path_cost + weight * h[c], entry, child_node))
+                    entry += 1
+
+        if goal_key not in nodes:
+            continue
+
+        # the optimal cost is at least the smallest g + h still open
+        cost = nodes[goal_key].path_cost
+        lower = min((nodes[s].path_cost + h[s] for s in opened | incons), default=cost)
+        bound = max(1.0, min(weight, cost / lower if lower > 0 else weight))
+        if cost < best_cost or bound < best_bound:
+            best_cost, best_bound = cost, bound
+            yield get_path(nodes[goal_key]), bound
+
+
+def ara_star(problem: Problem, weights=(3.0, 2.0, 1.5, 1.25, 1.0), callback=None,
+             limits: SearchLimits = None) -> Any:
+    """
+    Runs anytime_a_star to completion and returns the last path found or
+    an empty list if no path is found. If a callback is given it is called
+    with (path, bound) for every improved path as soon as it is found.
+    If limits are given a SearchResult is returned, which holds the best
+    path found before the limit was reached along with its bound.
+    """
+    path, bound = [], None
+    for path, bound in anytime_a_star(problem, weights, limits):
+        if callback is not None:
+            callback(path, bound)
+    if limits is None:
+        return path
+    if limits.status is not None:
+        return limits.result(limits.status, path, bound=bound)
+    if bound is None:
+        return no_path(limits)
+    return limits.result(SOLVED, path, bound=bound)
+
+
+def beam_search(problem: Problem, width: int = 100, max_depth: int = 1000, limits: SearchLimits = None) -> Any:
+    """
+    Takes in a Problem object that has an initial and goal state as
+    well as search operators (methods). Performs a Beam Search that only
+    keeps the width children with the lowest estimated cost of each layer.
+    Duplicates are only detected against the previous and current layer, so
+    memory stays around width * max_depth nodes. The search is fast but
+    incomplete: it returns an empty list if the beam dies out or max_depth
+    layers pass without reaching the goal.
+    """
+    if limits is not None:
+        limits.start()
+    node = Node(problem.initial)
+    if problem.is_goal(node.state):
+        return solved(limits, get_path(node))
+
+    best_h = problem.estimated_cost(node.state)
+    best = node
+    beam = [node]
+    previous = set()
+    entry = 0
+    for depth in range(max_depth):
+        current = {problem.hashable_state(n.state) for n in beam}
+        candidates = {}
+        if limits is not None:
+            limits.track(beam=beam, candidates=candidates)
+        for node in beam:
+            if limits is not None and limits.expanded() is not None:
+                return limits.result(limits.status, [], get_path(best))
+            for child_node in problem.expand(node):
+                if problem.is_goal(child_node.state):
+                    return solved(limits, get_path(child_node))
+                s = problem.hashable_state(child_node.state)
+                if s in previous or s in current or s in candidates:
+                    continue
+                candidates[s] = (entry, child_node)
+                entry += 1
+        if not candidates:
+            break
+        # the whole layer is scored with one heuristic call
+        costs = problem.estimated_costs([n.state for _, n in candidates.values()]).tolist()
+        scored = [(h, e, n) for h, (e, n) in zip(costs, candidates.values())]
+        lowest = min(scored)
+        if lowest[0] < best_h:
+            best_h, best = lowest[0], lowest[2]
+        beam = [n for _, _, n in heapq.nsmallest(width, scored)]
+        previous = current
+
+    return no_path(limits)  # failure
+
+
+class _SMANode:
+    """
+    Node of the search tree kept by SMA*. Successors are generated one
+    at a time and the f values of forgotten children are remembered.
+    """
+    __slots__ = ("state", "key", "parent", "action", "g", "f", "depth", "successors",
+                 "generated", "children", "forgotten", "open", "alive", "stamp")
+
+    def __init__(self, state, key, parent, action, g, f, depth):
+        self.state = state
+        self.key = key
+        self.parent = parent
+        self.action = action
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.successors = None  # key -> (action, state, g), filled on first expansion
+        self.generated = 0  # successors generated at least once
+        self.children = {}  # key -> _SMANode in memory
+        self.forgotten = {}  # key -> backed up f of removed children
+        self.open = True
+        self.alive = True
+        self.stamp = 0
+
+    def path(self) -> List[str]:
+        p = []
+        node = self
+        while node.parent is not None:
+            p.append(node.action)
+            node = node.parent
+        p.reverse()
+        return p
+
+
+def sma_star(problem: Problem, max_nodes: int = 10000, limits: SearchLimits = None) -> Any:
+    """
+    Takes in a Problem object that has an initial and goal state as
+    well as search operators (methods). Performs Simplified Memory-bounded
+    A* (SMA*), which never keeps more than max_nodes search tree nodes.
+    When memory is full the shallowest leaf with the highest f value is
+    dropped and its f value is backed up in its parent, which is
+    regenerated later if it becomes the best option again. Returns the
+    optimal path among those that fit in memory or an empty list.
+    """
+    if limits is not None:
+        limits.start()
+    infinity = float("inf")
+    root = _SMANode(problem.initial, problem.hashable_state(problem.initial), None, None, 0,
+                    problem.estimated_cost(problem.initial), 0)
+    alive = {root}
+    best_heap = []  # (f, -depth, entry, stamp, node) lowest f, deepest first
+    worst_heap = []  # (-f, depth, entry, stamp, node) highest f, shallowest first
+    if limits is not None:
+        limits.track(nodes=alive, frontier=best_heap, frontier_worst=worst_heap)
+    entry = 0
+
+    def touch(node: _SMANode):
+        nonlocal entry
+        node.stamp += 1
+        if node.open and node.alive:
+            heapq.heappush(best_heap, (node.f, -node.depth, entry, node.stamp, node))
+            heapq.heappush(worst_heap, (-node.f, node.depth, entry, node.stamp, node))
+            entry += 1
+
+    def update_open(node: _SMANode):
+        # a node stays open while it can still generate a child or can be dropped as a leaf
+        node.open = (node.successors is None or node.generated < len(node.successors)
+                     or bool(node.forgotten) or not node.children)
+        touch(node)
+
+    def valid(item) -> bool:
+        node = item[4]
+        return node.alive and node.open and node.stamp == item[3]
+
+    def backup(node: _SMANode):
+        while node is not None and node.successors is not None and node.generated == len(node.successors):
+            f = min([c.f for c in node.children.values()] + list(node.forgotten.values()), default=infinity)
+            if f == node.f:
+                break
+            node.f = f
+            touch(node)
+            node = node.parent
+
+    def forget_worst_leaf(keep: _SMANode) -> bool:
+        skipped = []
+        leaf = None
+        while worst_heap:
+            item = heapq.heappop(worst_heap)
+            if not valid(item):
+                continue
+            node = item[4]
+            if node is keep or node is root or node.children:
+                skipped.append(item)
+                continue
+            leaf = node
+            break
+        for item in skipped:
+            heapq.heappush(worst_heap, item)
+        if leaf is None:
+            return False
+        parent = leaf.parent
+        del parent.children[leaf.key]
+        parent.forgotten[leaf.key] = leaf.f
+        leaf.alive = False
+        alive.discard(leaf)
+        update_open(parent)
+        return True
+
+    touch(root)
+    while True:
+        if len(best_heap) > 8 * max_nodes + 1024:
+            # drop stale heap entries
+            best_heap.clear()
+            worst_heap.clear()
+            for node in alive:
+                touch(node)
+
+        while best_heap and not valid(best_heap[0]):
+            heapq.heappop(best_heap)
+        if not best_heap or best_heap[0][0] == infinity:
+            return no_path(limits)  # failure, or no path fits in memory
+        b = best_heap[0][4]
+        if problem.is_goal(b.state):
+            return solved(limits, b.path())
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], b.path())
+
+        if b.successors is None:
+            ancestors = set()
+            node = b
+            while node is not None:
+                ancestors.add(node.key)
+                node = node.parent
+            b.successors = {}
+            for child_node in problem.expand(Node(b.state, path_cost=b.g)):
+                s = problem.hashable_state(child_node.state)
+                if s not in ancestors and s not in b.successors:
+                    b.successors[s] = (child_node.action, child_node.state, child_node.path_cost)
+            if not b.successors:
+                # dead end, keep it as a droppable leaf that is never chosen
+                b.f = infinity
+                update_open(b)
+                backup(b.parent)
+                continue
+
+        if b.generated < len(b.successors):
+            s = list(b.successors)[b.generated]
+            b.generated += 1
+            action, state, g = b.successors[s]
+            if not problem.is_goal(state) and b.depth + 1 >= max_nodes - 1:
+                f = infinity  # no room left to go deeper
+            else:
+                f = max(b.f, g + problem.estimated_cost(state))
+        else:
+            s = min(b.forgotten, key=b.forgotten.get)
+            f = b.forgotten.pop(s)
+            action, state, g = b.successors[s]
+
+        if len(alive) >= max_nodes:
+            forget_worst_leaf(b)
+        child = _SMANode(state, s, b, action, g, f, b.depth + 1)
+        b.children[s] = child
+        alive.add(child)
+        touch(child)
+
+        if b.generated == len(b.successors):
+            backup(b)
+        update_open(b)
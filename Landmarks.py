@@ -0,0 +1,125 @@
+import collections
+from typing import List
+
+import numpy as np
+
+from Problem import MazeNavigation
+
+# landmark tables already built, keyed by maze layout and number of landmarks
+_tables = {}
+
+
+def grid_distances(grid: np.ndarray, source: int) -> np.ndarray:
+    """
+    Breadth first search over the walkable cells of a maze
+    :param grid: maze without the agent, 0s are impassable
+    :param source: flat index of the cell to measure from
+    :return: float array with the distance to every cell, inf if unreachable
+    """
+    height, width = grid.shape
+    walkable = (grid != 0).ravel().tolist()
+    distances = [-1] * (height * width)
+    distances[source] = 0
+    frontier = collections.deque([source])
+    while frontier:
+        cell = frontier.popleft()
+        row, col = divmod(cell, width)
+        step = distances[cell] + 1
+        for next_row, next_col in ((row - 1, col), (row, col + 1), (row + 1, col), (row, col - 1)):
+            if 0 <= next_row < height and 0 <= next_col < width:
+                next_cell = next_row * width + next_col
+                if distances[next_cell] < 0 and walkable[next_cell]:
+                    distances[next_cell] = step
+                    frontier.append(next_cell)
+    ret = np.array(distances, dtype=float)
+    ret[ret < 0] = np.inf
+    return ret
+
+
+class LandmarkTable:
+    """
+    Exact distances from k landmark cells of a maze. By the triangle
+    inequality |d(L, n) - d(L, goal)| never overestimates the distance from
+    n to the goal, which gives a much tighter heuristic than the manhattan
+    distance on mazes with walls.
+    """
+
+    def __init__(self, grid: np.ndarray, k: int = 8):
+        """
+        Selects the landmarks with the farthest point heuristic and measures
+        the distance from each of them to every cell
+        :param grid: maze without the agent, 0s are impassable
+        :param k: number of landmarks
+        """
+        self._shape = grid.shape
+        walkable = np.flatnonzero(grid != 0)
+        self.landmarks: List[int] = []
+        rows = []
+        if len(walkable) > 0:
+            # the cell farthest from an arbitrary one is the first landmark,
+            # every next one is the cell farthest from all chosen so far
+            closest = grid_distances(grid, int(walkable[0]))
+            for _ in range(min(k, len(walkable))):
+                reachable = np.where(np.isfinite(closest), closest, -1)
+                cell = int(np.argmax(reachable))
+                if reachable[cell] <= 0 and self.landmarks:
+                    break
+                self.landmarks.append(cell)
+                rows.append(grid_distances(grid, cell))
+                closest = np.minimum(closest, rows[-1]) if len(rows) > 1 else rows[-1]
+        self.distances = np.array(rows).reshape(len(rows), grid.size)
+
+    def heuristic_to(self, goal: int) -> np.ndarray:
+        """
+        Lower bound on the distance from every cell to the goal, combined
+        with the manhattan distance
+        :param goal: flat index of the goal cell
+        :return: float array indexed by cell, inf for cells cut off from the goal
+        """
+        height, width = self._shape
+        rows, cols = np.divmod(np.arange(height * width), width)
+        goal_row, goal_col = divmod(goal, width)
+        bound = (np.abs(rows - goal_row) + np.abs(cols - goal_col)).astype(float)
+        if len(self.distances) == 0:
+            return bound
+
+        to_goal = self.distances[:, goal][:, None]
+        both = np.isfinite(self.distances) & np.isfinite(to_goal)
+        diff = np.where(both, np.abs(self.distances - np.where(np.isfinite(to_goal), to_goal, 0)), 0)
+        bound = np.maximum(bound, diff.max(axis=0))
+        # a landmark that reaches only one of the two cells proves they are disconnected
+        cut_off = (np.isfinite(self.distances) != np.isfinite(to_goal)).any(axis=0)
+        bound[cut_off] = np.inf
+        return bound
+
+
+def get_landmarks(problem: MazeNavigation, k: int = 8) -> LandmarkTable:
+    """
+    Returns the landmark table of the problem's maze, building it only
+    the first time a maze with this layout is seen
+    """
+    grid = problem.grid
+    key = (grid.shape, k, grid.tobytes())
+    if key not in _tables:
+        _tables[key] = LandmarkTable(grid, k)
+    return _tables[key]
+
+
+def enable_landmarks(problem: MazeNavigation, k: int = 8) -> LandmarkTable:
+    """
+    Replaces the heuristic of a maze problem with the landmark (ALT) lower
+    bound towards its goal. Attach a HeuristicCache after this, not before.
+    :param problem: maze navigation problem
+    :param k: number of landmarks
+    :return: landmark table used by the problem
+    """
+    table = get_landmarks(problem, k)
+    estimates = table.heuristic_to(problem.state_key(problem.goal)).tolist()
+    problem.estimated_cost_key = estimates.__getitem__
+    problem.estimated_cost = lambda current: estimates[problem.state_key(current)]
+    lookup = np.asarray(estimates)
+    problem.estimated_costs_key = lambda keys: lookup[np.asarray(keys, dtype=np.int64)]
+    problem.estimated_costs = lambda states: problem.estimated_costs_key(
+        [problem.state_key(state) for state in states])
+    problem.heuristic = f"landmarks_{k}"
+    return table
@@ -0,0 +1,177 @@
+import struct
+import zlib
+from typing import Any, Iterable, List
+
+import numpy as np
+
+from Problem import Problem
+
+# color codes of a rendered cell, later codes are drawn over earlier ones
+WALL, OPEN, COSTLY, EXPLORED, FRONTIER, PATH, START, GOAL = range(8)
+
+# RGB color of every code, same colors as draw_maze used for the maze itself
+PALETTE = np.array([
+    (0, 0, 0),        # impassable
+    (255, 255, 255),  # walkable
+    (128, 128, 128),  # higher path cost
+    (173, 216, 230),  # expanded by the search
+    (255, 200, 0),    # generated but never expanded
+    (0, 0, 255),      # final path
+    (0, 128, 0),      # start
+    (255, 0, 0),      # goal
+], dtype=np.uint8)
+
+MOVES = {"north": (-1, 0), "east": (0, 1), "south": (1, 0), "west": (0, -1)}
+
+
+class SearchRecorder:
+    """
+    Records which states a search expands and generates by wrapping the
+    successors method of one problem instance, so any search that uses
+    the successor interface can be rendered afterwards.
+    """
+
+    def __init__(self, problem: Problem):
+        """
+        Creates the recorder and attaches it to the problem
+        :param problem: problem whose successor calls are recorded
+        """
+        self._problem = problem
+        self._successors = problem.successors
+        self.expanded: List[Any] = []
+        self.generated = set()
+        problem.successors = self.successors
+
+    def detach(self):
+        """Restores the unrecorded successors method of the problem"""
+        del self._problem.successors
+
+    def successors(self, key: Any):
+        """
+        Recorded version of the problem's successors
+        :param key: key of the current state
+        :return: list of (action, key of the next state, step cost)
+        """
+        ret = list(self._successors(key))
+        self.expanded.append(key)
+        self.generated.update(child for _, child, _ in ret)
+        return ret
+
+    @property
+    def frontier(self) -> set:
+        """keys that were generated but never expanded"""
+        return self.generated.difference(self.expanded)
+
+
+def path_cells(start: int, actions: Iterable[str], width: int) -> np.ndarray:
+    """
+    Turns a list of actions into the flat indices of the cells it visits
+    :param start: flat index of the start cell
+    :param actions: actions of the path
+    :param width: width of the maze
+    :return: array of cell indices starting with start
+    """
+    steps = [MOVES[a][0] * width + MOVES[a][1] for a in actions]
+    return np.cumsum([start] + steps, dtype=np.int64)
+
+
+def _cell_indices(cells: Any, shape: tuple) -> np.ndarray:
+    """
+    Accepts a boolean mask, or an iterable of flat indices or (row, col)
+    pairs, and returns the flat indices
+    """
+    if cells is None:
+        return np.empty(0, dtype=np.int64)
+    if isinstance(cells, np.ndarray) and cells.dtype == bool:
+        return np.flatnonzero(cells)
+    cells = np.asarray(list(cells), dtype=np.int64)
+    if cells.ndim == 2:
+        cells = np.ravel_multi_index((cells[:, 0], cells[:, 1]), shape)
+    return cells.ravel()
+
+
+def maze_image(initial_state: np.ndarray, goal_state: np.ndarray, explored: Any = None, frontier: Any = None,
+               path: Any = None, scale: int = 1) -> np.ndarray:
+    """
+    Renders a maze and optionally the work of a search on it. Every cell
+    gets a color code and the palette is applied once to the whole grid.
+    :param initial_state: maze with the agent marked as 2
+    :param goal_state: maze with the goal marked as 2
+    :param explored: expanded cells, as a mask, flat indices or (row, col) pairs
+    :param frontier: generated but unexpanded cells, in the same forms
+    :param path: actions from the start, or the cells of the path
+    :param scale: width and height in pixels of one cell
+    :return: uint8 array of shape (rows * scale, cols * scale, 3)
+    """
+    shape = initial_state.shape
+    codes = np.full(shape, OPEN, dtype=np.uint8)
+    codes[initial_state == 0] = WALL
+    codes[initial_state == -1] = COSTLY
+    flat = codes.ravel()
+    start = np.flatnonzero(initial_state == 2)
+    goal = np.flatnonzero(goal_state == 2)
+
+    flat[_cell_indices(explored, shape)] = EXPLORED
+    flat[_cell_indices(frontier, shape)] = FRONTIER
+    if path is not None and len(path) > 0:
+        if isinstance(path[0], str):
+            path = path_cells(int(start[0]), path, shape[1])
+        flat[_cell_indices(path, shape)] = PATH
+    flat[start] = START
+    flat[goal] = GOAL
+
+    image = PALETTE[codes]
+    if scale > 1:
+        image = image.repeat(scale, axis=0).repeat(scale, axis=1)
+    return image
+
+
+def ppm_bytes(image: np.ndarray) -> bytes:
+    """encodes an RGB image as a binary PPM file"""
+    height, width = image.shape[:2]
+    return b"P6\n%d %d\n255\n" % (width, height) + np.ascontiguousarray(image, dtype=np.uint8).tobytes()
+
+
+def png_bytes(image: np.ndarray) -> bytes:
+    """encodes an RGB image as a PNG file, every row is stored unfiltered"""
+    height, width = image.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+def save_image(image: np.ndarray, filename: str):
+    """
+    Writes an RGB image, the format is picked from the file extension
+    :param image: uint8 array of shape (height, width, 3)
+    :param filename: name ending in .png or .ppm
+    """
+    if filename.lower().endswith(".png"):
+        data = png_bytes(image)
+    elif filename.lower().endswith(".ppm"):
+        data = ppm_bytes(image)
+    else:
+        raise ValueError(f"Unknown image format {filename}, use .png or .ppm")
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def show_image(image: np.ndarray):
+    """
+    Displays an RGB image in a window as a single canvas item. tkinter is
+    only imported here so headless runs never need it.
+    """
+    from tkinter import PhotoImage
+    from shapes import Paper
+
+    height, width = image.shape[:2]
+    paper = Paper(width, height)
+    photo = PhotoImage(master=Paper.tk, data=ppm_bytes(image), format="PPM")
+    Paper.tk.canvas.create_image(0, 0, image=photo, anchor="nw")
+    paper.display()
@@ -0,0 +1,147 @@
+import itertools
+import sys
+from typing import Any, Dict
+
+import numpy as np
+
+# items measured per structure in each sample, the rest are assumed to be alike
+SAMPLE_ITEMS = 64
+
+
+def _scalar_size(value: Any) -> int:
+    # small ints are cached by the interpreter and cost nothing extra
+    if isinstance(value, float) or (isinstance(value, int) and not -5 <= value <= 256):
+        return sys.getsizeof(value)
+    return 0
+
+
+def _key_size(key: Any) -> int:
+    """size of a dictionary key together with the values it is built from"""
+    if isinstance(key, tuple):
+        return sys.getsizeof(key) + sum(_key_size(k) for k in key)
+    if isinstance(key, (bytes, str)):
+        return sys.getsizeof(key)
+    return _scalar_size(key)
+
+
+def _measure(item: Any, owner: bool, name: str, sizes: Dict[str, int]):
+    """
+    Adds the size of one item of a structure to sizes. Search nodes go to
+    "nodes" and their states to "states", everything else to the structure.
+    Nodes, states and keys are only counted by the structure that owns them.
+    """
+    if isinstance(item, np.ndarray):
+        if owner:
+            sizes["states"] = sizes.get("states", 0) + sys.getsizeof(item)
+    elif hasattr(item, "state"):
+        if owner:
+            size = sys.getsizeof(item) + (sys.getsizeof(item.__dict__) if hasattr(item, "__dict__") else 0)
+            sizes["nodes"] = sizes.get("nodes", 0) + size
+            _measure(item.state, owner, name, sizes)
+    elif isinstance(item, (tuple, list)):
+        # frontier entries and reached table values, keys inside them belong to the reached table
+        sizes[name] = sizes.get(name, 0) + sys.getsizeof(item) + sum(_scalar_size(v) for v in item)
+        for v in item:
+            if isinstance(v, (np.ndarray, set, dict)) or hasattr(v, "state"):
+                _measure(v, owner, name, sizes)
+    elif isinstance(item, (set, dict)):
+        sizes[name] = sizes.get(name, 0) + sys.getsizeof(item)
+    elif owner:
+        sizes[name] = sizes.get(name, 0) + _key_size(item)
+
+
+def estimate_size(structure: Any, name: str, owner: bool = True) -> Dict[str, int]:
+    """
+    Estimates the bytes held by a search structure from a sample of its items
+    :param structure: dict, list, deque, set, queue, bytearray, array or an
+    object with a size_bytes attribute like HeuristicCache
+    :param name: component the container and its entries are reported as
+    :param owner: false if the nodes, states and keys it holds are owned by another structure
+    :return: bytes per component
+    """
+    if hasattr(structure, "size_bytes"):
+        return {name: structure.size_bytes}
+    if hasattr(structure, "queue"):
+        structure = structure.queue  # queue.Queue and PriorityQueue
+    if isinstance(structure, (np.ndarray, bytearray, bytes)):
+        return {name: sys.getsizeof(structure)}
+
+    sizes = {name: sys.getsizeof(structure)}
+    count = len(structure)
+    if count == 0:
+        return sizes
+    if isinstance(structure, list):
+        sample = structure[::max(1, count // SAMPLE_ITEMS)]
+    else:
+        sample = list(itertools.islice(structure.items() if isinstance(structure, dict) else structure,
+                                       SAMPLE_ITEMS))
+
+    sampled = {}
+    for item in sample:
+        if isinstance(structure, dict):
+            key, item = item
+            if owner:
+                sampled[name] = sampled.get(name, 0) + _key_size(key)
+        _measure(item, owner, name, sampled)
+    for component, size in sampled.items():
+        sizes[component] = sizes.get(component, 0) + int(size * count / len(sample))
+    return sizes
+
+
+class MemoryMonitor:
+    """
+    Breaks the memory of a search down by data structure. Searches register
+    their reached tables and frontiers through SearchLimits.track and the
+    sizes are estimated every interval expansions instead of tracing every
+    allocation. The peak is the sample with the largest total.
+    """
+
+    def __init__(self, interval: int = 1024):
+        """
+        :param interval: number of node expansions between samples
+        """
+        self.interval = max(1, interval)
+        self._structures = {}
+        self.start()
+
+    def start(self):
+        """Forgets the samples and the structures of the previous search"""
+        self._structures = {name: s for name, s in self._structures.items() if s[2]}
+        self.samples = 0
+        self.peak: Dict[str, int] = {}
+        self.peak_total = 0
+
+    def track(self, name: str, structure: Any, owner: bool = True, persistent: bool = False):
+        """
+        Adds a structure to the samples
+        :param name: component the structure is reported as, e.g. "reached"
+        :param structure: the structure itself, see estimate_size
+        :param owner: false if the nodes, states and keys it holds are counted elsewhere
+        :param persistent: keep it across searches, e.g. a heuristic cache
+        """
+        self._structures[name] = (structure, owner, persistent)
+
+    def sample(self) -> Dict[str, int]:
+        """
+        Estimates the size of every tracked structure and updates the peak
+        :return: bytes per component
+        """
+        sizes = {}
+        for name, (structure, owner, _) in self._structures.items():
+            for component, size in estimate_size(structure, name, owner).items():
+                sizes[component] = sizes.get(component, 0) + size
+        self.samples += 1
+        total = sum(sizes.values())
+        if total >= self.peak_total:
+            self.peak, self.peak_total = sizes, total
+        return sizes
+
+    def finish(self):
+        """Takes a last sample and lets go of the structures of the finished search"""
+        self.sample()
+        self._structures = {name: s for name, s in self._structures.items() if s[2]}
+
+    def __str__(self) -> str:
+        components = ", ".join(f"{name} {size:.2e}" for name, size in
+                               sorted(self.peak.items(), key=lambda item: -item[1]))
+        return f"Memory by structure at peak {self.peak_total:.2e} bytes ({self.samples} samples): {components}"
@@ -0,0 +1,161 @@
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# bits per tile, tiles of boards up to 4x4 fit in one uint64
+TILE_BITS = 4
+TILE_MASK = np.uint64(0xF)
+
+# (row step, column step) of the blank for every action code, in the order of SlidingPuzzle.ACTIONS
+MOVES = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+
+
+def blank_moves(size: int) -> List[List[Tuple[int, int]]]:
+    """
+    For every position of the blank on a size x size board, the list of
+    (action code, position the blank moves to) in the order of MOVES. This
+    is the one move table the puzzle, its solution table and the ranked
+    search share, so their move orders cannot drift apart.
+    """
+    ret = []
+    for pos in range(size * size):
+        row, col = divmod(pos, size)
+        ret.append([(code, pos + row_step * size + col_step) for code, (row_step, col_step) in enumerate(MOVES)
+                    if 0 <= row + row_step < size and 0 <= col + col_step < size])
+    return ret
+
+
+def pack_boards(boards: np.ndarray) -> np.ndarray:
+    """
+    Packs boards into one uint64 each, the tile at position i goes in bits
+    4i to 4i + 3
+    :param boards: (count, n) array of flattened boards with n <= 16
+    :return: uint64 array of packed boards
+    """
+    boards = np.asarray(boards)
+    if boards.shape[1] > 64 // TILE_BITS:
+        raise ValueError(f"Boards of {boards.shape[1]} tiles do not fit in 64 bits")
+    packed = np.zeros(len(boards), dtype=np.uint64)
+    for i in range(boards.shape[1]):
+        packed |= boards[:, i].astype(np.uint64) << np.uint64(TILE_BITS * i)
+    return packed
+
+
+def unpack_boards(packed: np.ndarray, tiles: int) -> np.ndarray:
+    """
+    Inverse of pack_boards
+    :param tiles: number of tiles on a board, 9 for the 3x3 puzzle
+    :return: (count, tiles) uint8 array of boards in row major order
+    """
+    packed = np.asarray(packed, dtype=np.uint64)
+    boards = np.empty((len(packed), tiles), dtype=np.uint8)
+    for i in range(tiles):
+        boards[:, i] = (packed >> np.uint64(TILE_BITS * i)) & TILE_MASK
+    return boards
+
+
+def blank_positions(packed: np.ndarray, tiles: int) -> np.ndarray:
+    """position of the blank (tile 0) on every packed board"""
+    positions = np.zeros(len(packed), dtype=np.int64)
+    for i in range(tiles):
+        positions[((packed >> np.uint64(TILE_BITS * i)) & TILE_MASK) == 0] = i
+    return positions
+
+
+def packed_successors(layer: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Generates the children of every board in a layer, one array operation
+    per blank move. As the blank's nibble is 0, moving tile t from position
+    p to the blank at b is board - (t << 4p) + (t << 4b).
+    :param layer: uint64 array of packed boards
+    :param size: width of the puzzle
+    :return: (children, index in layer of each child's parent, action code of the move)
+    """
+    blanks = blank_positions(layer, size * size)
+    rows, cols = np.divmod(blanks, size)
+    children, parents, codes = [], [], []
+    for code, (row_step, col_step) in enumerate(MOVES):
+        index = np.flatnonzero((0 <= rows + row_step) & (rows + row_step < size) &
+                               (0 <= cols + col_step) & (cols + col_step < size))
+        blank = blanks[index].astype(np.uint64) * np.uint64(TILE_BITS)
+        moved = (blanks[index] + row_step * size + col_step).astype(np.uint64) * np.uint64(TILE_BITS)
+        boards = layer[index]
+        tile = (boards >> moved) & TILE_MASK
+        children.append(boards - (tile << moved) + (tile << blank))
+        parents.append(index)
+        codes.append(np.full(len(index), code, dtype=np.int8))
+    return np.concatenate(children), np.concatenate(parents), np.concatenate(codes)
+
+
+def packed_layers(start: np.ndarray, size: int, max_depth: int = None) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Breadth first sweep from packed boards, one sorted array per layer.
+    Children are deduplicated with np.unique and against the previous layer
+    with np.isin. Every move changes the row or column of the blank by one,
+    so the graph is bipartite and the previous layer is the only one a
+    child can already be in, only two layers are held at a time.
+    :param start: packed boards of layer 0
+    :param size: width of the puzzle
+    :param max_depth: last layer to generate, None to sweep the whole space
+    :return: iterator of (depth, layer, action code that first reached each board)
+    """
+    layer = np.unique(np.asarray(start, dtype=np.uint64))
+    previous = np.zeros(0, dtype=np.uint64)
+    depth = 0
+    yield depth, layer, np.full(len(layer), -1, dtype=np.int8)
+    while len(layer) and (max_depth is None or depth < max_depth):
+        children, _, codes = packed_successors(layer, size)
+        children, first = np.unique(children, return_index=True)
+        new = ~np.isin(children, previous, assume_unique=True)
+        previous, layer = layer, children[new]
+        depth += 1
+        if len(layer):
+            yield depth, layer, codes[first[new]]
+
+
+def distance_layers(goal_state: np.ndarray, max_depth: int = None) -> List[np.ndarray]:
+    """
+    Sorted packed boards at every distance from the goal, e.g. the first
+    25 layers of the 4x4 puzzle. A board's distance is the index of the
+    layer np.searchsorted finds it in.
+    :param goal_state: solved board of an N x N puzzle, N <= 4
+    :param max_depth: largest distance wanted, None for the whole space
+    :return: list of uint64 arrays indexed by distance
+    """
+    start = pack_boards(goal_state.reshape(1, -1))
+    return [layer for _, layer, _ in packed_layers(start, goal_state.shape[0], max_depth)]
+
+
+def layer_distance(layers: List[np.ndarray], board: np.ndarray) -> int:
+    """
+    Distance of a board in the layers of distance_layers
+    :return: number of moves or -1 if the board is further than the last layer
+    """
+    key = pack_boards(np.asarray(board).reshape(1, -1))[0]
+    for distance, layer in enumerate(layers):
+        i = np.searchsorted(layer, key)
+        if i < len(layer) and layer[i] == key:
+            return distance
+    return -1
+
+
+def layer_path(layers: List[np.ndarray], key: np.uint64, size: int) -> List[int]:
+    """
+    Rebuilds a path to a board of the last layer by finding, layer by
+    layer, a neighbor in the layer before
+    :param layers: every layer of a sweep from the start, the last one holding key
+    :param key: packed board to reach
+    :param size: width of the puzzle
+    :return: action codes of the moves from the start board to key
+    """
+    path = []
+    boards = np.array([key], dtype=np.uint64)
+    for previous in reversed(layers[:-1]):
+        children, _, codes = packed_successors(boards, size)
+        i = np.minimum(np.searchsorted(previous, children), len(previous) - 1)
+        found = np.flatnonzero(previous[i] == children)[0]
+        # the blank moved to the neighbor, so the opposite move led from it to the board
+        path.append((int(codes[found]) + 2) % len(MOVES))
+        boards = children[found:found + 1]
+    path.reverse()
+    return path
@@ -1,12 +1,21 @@
 from __future__ import annotations  # needed in order to reference a Class within itself
 
-from typing import List, Any, Generic, TypeVar
+import math
+from typing import List, Any, Generic, TypeVar, Iterable, Tuple, Sequence
 from abc import ABC, abstractmethod
 import numpy as np
 
+from PackedPuzzle import blank_moves
+from StateIndex import PermutationIndexer
+from PuzzleHeuristics import tile_manhattan, line_conflicts, linear_conflict, walking_distance, walking_distance_part
+
 # https://realpython.com/python-type-checking/
 T = TypeVar('T')
 
+# batches of heuristic calls up to this size, like the children of one
+# expansion, are cheaper one key at a time than with array operations
+SMALL_BATCH = 8
+
 
 class Node(Generic[T]):
     count = 0
@@ -157,6 +166,116 @@ class Problem(ABC, Generic[T]):
         """
         pass
 
+    # Low level successor interface. Problems that set supports_successors
+    # work on compact state keys so searches can skip building a Node and a
+    # full state for children that turn out to be duplicates. The defaults
+    # below work for any problem in terms of hashable_state and expand, a
+    # subclass sets supports_successors once it overrides them with cheaper
+    # versions.
+    supports_successors = False
+    # problems that set supports_neighbor_slices have integer keys below vertices and
+    # return the neighbors of a whole array of keys from layer_neighbors, so
+    # searches can expand a layer with array operations
+    supports_neighbor_slices = False
+
+    def state_key(self, state: T) -> Any:
+        """
+        Returns the compact key of a state used by the successor interface.
+        By default the key is hashable_state and the state is remembered so
+        key_state can rebuild it.
+        :param state: state object
+        :return: hashable key that identifies the state
+        """
+        key = self.hashable_state(state)
+        if getattr(self, "_key_states", None) is None:
+            self._key_states = {}
+        self._key_states.setdefault(key, state)
+        return key
+
+    def key_state(self, key: Any) -> T:
+        """
+        Builds the full state a key represents. By default it is the state
+        remembered by state_key.
+        :param key: key returned by state_key or successors
+        :return: state object
+        """
+        return self._key_states[key]
+
+    def successors(self, key: Any) -> Iterable[Tuple[str, Any, float]]:
+        """
+        Returns the neighbors of the state with the given key without
+        building their states. By default the state is expanded into
+        Nodes, subclasses override this to skip that.
+        :param key: key of the current state
+        :return: iterable of (action, key of the next state, step cost)
+        """
+        return [(child.action, self.state_key(child.state), child.path_cost)
+                for child in self.expand(Node(self.key_state(key)))]
+
+    def layer_neighbors(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the neighbors of many states at once, for problems that set
+        supports_neighbor_slices. Neighbors come in the order successors
+        would generate them for keys[0], keys[1], ... By default successors
+        is called once per key, subclasses override this with array operations.
+        :param keys: int array of state keys
+        :return: (neighbor keys, index in keys of the state each neighbor came from)
+        """
+        neighbors, parents = [], []
+        for i, key in enumerate(np.asarray(keys).tolist()):
+            for _, child, _ in self.successors(key):
+                neighbors.append(child)
+                parents.append(i)
+        return np.array(neighbors, dtype=np.int64), np.array(parents, dtype=np.int64)
+
+    def is_goal_key(self, key: Any) -> bool:
+        """
+        Returns true if the key is the key of the goal state
+        :param key: key of a state
+        :return: true or false if the key matches the goal
+        """
+        if getattr(self, "_goal_key", None) is None:
+            self._goal_key = self.state_key(self.goal)
+        return key == self._goal_key
+
+    def estimated_cost_key(self, key: Any):
+        """
+        Returns an estimate of the cost from the state with the given key
+        to the goal. Subclasses can override this to avoid building the state.
+        :param key: key of the current state
+        :return: cost from current state to the goal
+        """
+        return self.estimated_cost(self.key_state(key))
+
+    def estimated_cost_key_from(self, parent_key: Any, parent_cost: float, key: Any):
+        """
+        Returns the estimated cost of a child given its parent's estimate.
+        Subclasses can override this to update the estimate incrementally.
+        :param parent_key: key of the state the child was generated from
+        :param parent_cost: estimated cost of the parent
+        :param key: key of the child state
+        :return: cost from the child state to the goal
+        """
+        return self.estimated_cost_key(key)
+
+    def estimated_costs(self, states: Sequence[T]) -> np.ndarray:
+        """
+        Returns the estimated costs of many states at once, e.g. all the
+        children of an expansion. Subclasses can override this to evaluate
+        the whole batch with one vectorized call.
+        :param states: sequence of states or a stacked array of states
+        :return: array with the cost from each state to the goal
+        """
+        return np.array([self.estimated_cost(state) for state in states])
+
+    def estimated_costs_key(self, keys: Sequence[Any]) -> np.ndarray:
+        """
+        Returns the estimated costs of the states with the given keys at once
+        :param keys: sequence of state keys
+        :return: array with the cost from each state to the goal
+        """
+        return np.array([self.estimated_cost_key(key) for key in keys])
+
 
 class MazeNavigation(Problem[np.ndarray]):
     """
@@ -165,6 +284,8 @@ class MazeNavigation(Problem[np.ndarray]):
     are built to manipulate a numpy 2D array which is the state
     representation.
     """
+    # moves of the agent, the action codes of the neighbor table index this list
+    ACTIONS = ["north", "east", "south", "west"]
 
     def __init__(self, initial_state: T, goal_state: T):
         """
@@ -178,6 +299,11 @@ class MazeNavigation(Problem[np.ndarray]):
         self._character = 2
         self._walkable = 1
         self._impassable = 0
+        self._grid = None
+        # (cells, 4, 3) array of (neighbor cell, action code, step cost), built here
+        # so that searches timed after creating the problem do not pay for it
+        self._table = None
+        self.neighbor_table()
 
     def is_goal(self, current: T) -> bool:
         """
@@ -194,46 +320,61 @@ class MazeNavigation(Problem[np.ndarray]):
         :param node: Node object that represents a state
         :return: List of Node objects
         """
-        current_state = node.state
+        # one scan for the agent, the neighbors come from the table
         ret = []
-        for a in self._actions(current_state):
-            next_state = self._result(current_state, a)
-            cost = self._action_cost(current_state, a, next_state)
-            ret.append(Node(next_state, node, a, node.path_cost + cost, node.depth + 1))
+        for a, next_key, cost in self.successors(self.state_key(node.state)):
+            ret.append(Node(self.key_state(next_key), node, a, node.path_cost + cost, node.depth + 1))
         return ret
 
+    def neighbor_table(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Adjacency of every cell of the maze, built once per problem. Row c
+        lists the cells the agent can step to from cell c in the order of
+        ACTIONS, padded with -1 up to four entries.
+        :return: (neighbor cell ids, action codes, step costs), views of shape (cells, 4)
+        """
+        if self._table is None:
+            grid = self.grid
+            height, width = grid.shape
+            rows, cols = np.divmod(np.arange(grid.size), width)
+            padded = np.pad(grid, 1, constant_values=self._impassable).ravel()
+            # flat index of every cell inside the padded grid, whose border is impassable
+            inside = (rows + 1) * (width + 2) + cols + 1
+            steps = [(-width, -(width + 2)), (1, 1), (width, width + 2), (-1, -1)]
+
+            table = np.full((grid.size, 4, 3), -1, dtype=np.int64)
+            count = np.zeros(grid.size, dtype=np.int64)
+            for code, (step, padded_step) in enumerate(steps):
+                # all walkable tiles cost 1, including the costly -1 tiles
+                open_cells = np.flatnonzero(padded[inside + padded_step] != self._impassable)
+                slot = count[open_cells]
+                table[open_cells, slot, 0] = open_cells + step
+                table[open_cells, slot, 1] = code
+                table[open_cells, slot, 2] = 1
+                count[open_cells] += 1
+            self._table = table
+        return self._table[:, :, 0], self._table[:, :, 1], self._table[:, :, 2]
+
+    def _move(self, key: int, action: str) -> Tuple[int, float]:
+        """
+        Looks up the cell an action leads to from a cell and its cost
+        :param key: cell index
+        :param action: one of ACTIONS
+        :return: (neighbor cell index, step cost)
+        """
+        code = self.ACTIONS.index(action) if action in self.ACTIONS else None
+        for neighbor, a, cost in self._table[key].tolist():
+            if a == code:
+                return neighbor, cost
+        raise ValueError(f"Action {action} is not available from cell {key}")
+
     def _actions(self, state: T) -> List[str]:
         """
         Returns a list of actions available for the given state.
         :param state: current state
         :return: List of actions encoded as Strings
         """
-        ret = []
-        state: T
-
-        # size of the maze
-        height, width = state.shape
-
-        # gets our current location within the maze
-        row = np.where(state == self._character)[0][0]
-        col = np.where(state == self._character)[1][0]
-
-        # checks to see if there is a walkable space
-        # in the four cardinal direction
-        # North
-        if row - 1 >= 0 and state[row - 1][col] != self._impassable:
-            ret.append("north")
-        # East
-        if col + 1 < width and state[row][col + 1] != self._impassable:
-            ret.append("east")
-        # South
-        if row + 1 < height and state[row + 1][col] != self._impassable:
-            ret.append("south")
-        # West
-        if col - 1 >= 0 and state[row][col - 1] != self._impassable:
-            ret.append("west")
-
-        return ret
+        return [a for a, _, _ in self.successors(self.state_key(state))]
 
     def _result(self, state: T, action: str) -> T:
         """
@@ -243,24 +384,13 @@ class MazeNavigation(Problem[np.ndarray]):
         :param action: String that represents an action
         :return: state that is the result of applying an action to the current state
         """
+        key = self.state_key(state)
+        neighbor, _ = self._move(key, action)
 
         ret = np.copy(state)
-        # gets our current location within the maze
-        row = np.where(state == self._character)[0][0]
-        col = np.where(state == self._character)[1][0]
-
-        # move from the current location
-        ret[row][col] = self._walkable
-
-        # move to the new location
-        if action == "north":
-            ret[row - 1][col] = self._character
-        elif action == "east":
-            ret[row][col + 1] = self._character
-        elif action == "south":
-            ret[row + 1][col] = self._character
-        elif action == "west":
-            ret[row][col - 1] = self._character
+        # move from the current location to the new location
+        ret.flat[key] = self._walkable
+        ret.flat[neighbor] = self._character
         return ret
 
     def _action_cost(self, curr_state: T, action: str, next_state: T) -> float:
@@ -272,18 +402,7 @@ class MazeNavigation(Problem[np.ndarray]):
         :param next: state object that we will transition to
         :return:
         """
-
-        # where we are about to step to
-        next_row = np.where(next_state == self._character)[0][0]
-        next_col = np.where(next_state == self._character)[1][0]
-
-        # right now the cost for all the walkable tiles is just 1
-        # can be modified to add cost for different types of tiles
-        # to simulate difficult terrain
-        if curr_state[next_row][next_col] == -1:
-            return 1
-        elif curr_state[next_row][next_col] == self._walkable:
-            return 1
+        return self._move(self.state_key(curr_state), action)[1]
 
     def hashable_state(self, state: T) -> Any:
         """
@@ -317,10 +436,142 @@ class MazeNavigation(Problem[np.ndarray]):
         # returns manhathan distance between current and goal
         return abs(curr_row - goal_row) + abs(curr_col - goal_col)
 
+    # keys are the flat index of the agent's cell
+    supports_successors = True
+
+    @property
+    def grid(self) -> np.ndarray:
+        """the maze without the agent, its cell is marked walkable"""
+        if self._grid is None:
+            self._grid = np.copy(self.initial)
+            self._grid[self.initial == self._character] = self._walkable
+        return self._grid
+
+    def state_key(self, state: T) -> Any:
+        """
+        Returns the flat index of the agent's cell
+        :param state: state object
+        :return: cell index
+        """
+        return int(np.flatnonzero(state == self._character)[0])
+
+    def key_state(self, key: Any) -> T:
+        """
+        Builds the maze with the agent in the cell with the given index
+        :param key: cell index
+        :return: state object
+        """
+        ret = np.copy(self.grid)
+        ret.flat[key] = self._character
+        return ret
+
+    def successors(self, key: Any) -> Iterable[Tuple[str, Any, float]]:
+        """
+        Returns the walkable neighbors of a cell in the same order as _actions,
+        read from its row of the neighbor table
+        :param key: cell index
+        :return: list of (action, neighbor cell index, step cost)
+        """
+        actions = self.ACTIONS
+        return [(actions[a], neighbor, cost) for neighbor, a, cost in self._table[key].tolist() if neighbor >= 0]
+
+    def estimated_cost_key(self, key: Any):
+        """
+        Returns the manhattan distance from a cell to the goal cell
+        :param key: cell index
+        :return: cost from current state to the goal
+        """
+        width = self.grid.shape[1]
+        if getattr(self, "_goal_key", None) is None:
+            self._goal_key = self.state_key(self.goal)
+        row, col = divmod(key, width)
+        goal_row, goal_col = divmod(self._goal_key, width)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+    def estimated_costs(self, states: Sequence[T]) -> np.ndarray:
+        """
+        Returns the manhattan distances of many states, finding the agent
+        in all of them with one pass over the stacked mazes
+        :param states: sequence of states or a stacked array of states
+        :return: array with the cost from each state to the goal
+        """
+        if len(states) == 0:
+            return np.zeros(0, dtype=np.int64)
+        states = np.asarray(states)
+        cells = np.argmax(states.reshape(len(states), -1) == self._character, axis=1)
+        return self.estimated_costs_key(cells)
+
+    def estimated_costs_key(self, keys: Sequence[Any]) -> np.ndarray:
+        """
+        Returns the manhattan distances from many cells to the goal cell
+        :param keys: cell indexes
+        :return: array with the cost from each cell to the goal
+        """
+        if len(keys) <= SMALL_BATCH:
+            return np.array([self.estimated_cost_key(key) for key in keys], dtype=np.int64)
+        width = self.grid.shape[1]
+        if getattr(self, "_goal_key", None) is None:
+            self._goal_key = self.state_key(self.goal)
+        rows, cols = np.divmod(np.asarray(keys, dtype=np.int64), width)
+        goal_row, goal_col = divmod(self._goal_key, width)
+        return np.abs(rows - goal_row) + np.abs(cols - goal_col)
+
 
 class SlidingPuzzle(Problem[np.array]):
-    def __int__(self, initial_state: T, goal_state: T):
+    # moves of the blank, opposite moves are two apart
+    ACTIONS = ["north", "east", "south", "west"]
+    # manhattan is the original estimate, which also counts the blank
+    HEURISTICS = ["manhattan", "linear_conflict", "walking_distance"]
+
+    def __init__(self, initial_state: T, goal_state: T, heuristic: str = "manhattan"):
+        """
+        Initializes an N x N sliding puzzle
+        :param initial_state: Initial state of the problem
+        :param goal_state: Goal state of the problem
+        :param heuristic: one of HEURISTICS used by estimated_cost
+        """
         super().__init__(initial_state, goal_state)
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown heuristic {heuristic}, expected one of {self.HEURISTICS}")
+        self._heuristic = heuristic
+
+    @property
+    def heuristic(self) -> str:
+        """name of the heuristic used by estimated_cost"""
+        return self._heuristic
+
+    @property
+    def indexer(self) -> PermutationIndexer:
+        """permutation indexer that ranks states of this puzzle"""
+        if getattr(self, "_indexer", None) is None:
+            self._indexer = PermutationIndexer(self.initial.size)
+        return self._indexer
+
+    def rank(self, state: T) -> int:
+        """
+        Returns the Lehmer rank of the state, a unique index
+        between 0 and (n*n)! - 1
+        :param state: state to rank
+        :return: rank of the state
+        """
+        return self.indexer.rank(state.ravel().tolist())
+
+    def unrank(self, rank: int) -> T:
+        """
+        Returns the state with the given Lehmer rank
+        :param rank: rank of a state
+        :return: state object
+        """
+        perm = self.indexer.unrank(rank)
+        return np.array(perm, dtype=self.initial.dtype).reshape(self.initial.shape)
+
+    def reverse_action(self, action: str) -> str:
+        """
+        Returns the action that undoes the passed in action
+        :param action: String that represents an action
+        :return: String of the opposite action
+        """
+        return self.ACTIONS[(self.ACTIONS.index(action) + 2) % 4]
 
     def is_goal(self, current: T) -> bool:
         return np.array_equal(current, self.goal)
@@ -384,6 +635,8 @@ class SlidingPuzzle(Problem[np.array]):
         return state.tobytes()
 
     def estimated_cost(self, current: T):
+        if self._heuristic != "manhattan":
+            return self.estimated_cost_key(self.state_key(current))
         distance = 0
         size = current.shape[1]
         for y in range(size):
@@ -396,3 +649,305 @@ class SlidingPuzzle(Problem[np.array]):
                 goal_col = np.where(self.goal == value)[1][0]
                 distance += abs(curr_row - goal_row) + abs(curr_col - goal_col)
         return distance
+
+    # keys are the tiles in row major order packed into bytes
+    supports_successors = True
+
+    def _blank_moves(self) -> List[List[tuple]]:
+        """
+        For every position of the blank, the (action, position the blank
+        moves to) pairs in the same order as _actions
+        """
+        if getattr(self, "_moves", None) is None:
+            self._moves = [[(self.ACTIONS[code], pos) for code, pos in moves]
+                           for moves in blank_moves(self.initial.shape[0])]
+        return self._moves
+
+    def state_key(self, state: T) -> Any:
+        return state.astype(np.uint8).tobytes()
+
+    def key_state(self, key: Any) -> T:
+        return np.frombuffer(key, dtype=np.uint8).astype(self.initial.dtype).reshape(self.initial.shape)
+
+    def successors(self, key: Any) -> Iterable[Tuple[str, Any, float]]:
+        blank = key.index(0)
+        ret = []
+        for action, pos in self._blank_moves()[blank]:
+            tiles = bytearray(key)
+            tiles[blank] = tiles[pos]
+            tiles[pos] = 0
+            ret.append((action, bytes(tiles), 1))
+        return ret
+
+    def _goal_lines(self) -> Tuple[list, list]:
+        """goal row and goal column of every tile, indexed by tile value"""
+        if getattr(self, "_goal_rows", None) is None:
+            width = self.initial.shape[1]
+            self._goal_rows = [0] * self.goal.size
+            self._goal_cols = [0] * self.goal.size
+            for pos, value in enumerate(self.goal.ravel().tolist()):
+                self._goal_rows[value], self._goal_cols[value] = divmod(pos, width)
+        return self._goal_rows, self._goal_cols
+
+    def estimated_cost_key(self, key: Any):
+        size = self.initial.shape[1]
+        goal_rows, goal_cols = self._goal_lines()
+        if self._heuristic == "linear_conflict":
+            return linear_conflict(key, size, goal_rows, goal_cols)
+        if self._heuristic == "walking_distance":
+            return walking_distance(key, size, goal_rows, goal_cols)
+        # same sum of manhattan distances as estimated_cost, blank included
+        return tile_manhattan(key, size, goal_rows, goal_cols) + (
+            abs(key.index(0) // size - goal_rows[0]) + abs(key.index(0) % size - goal_cols[0]))
+
+    def _manhattan_rows(self, tiles: np.ndarray, blank: bool) -> np.ndarray:
+        """
+        Sums of the manhattan distances of a (states, cells) array of tiles
+        :param blank: true to count the blank like estimated_cost does
+        """
+        if getattr(self, "_goal_positions", None) is None:
+            goal_rows, goal_cols = self._goal_lines()
+            size = self.initial.shape[1]
+            rows, cols = np.divmod(np.arange(self.goal.size), size)
+            self._goal_positions = np.array(goal_rows), np.array(goal_cols), rows, cols
+        goal_rows, goal_cols, rows, cols = self._goal_positions
+        distance = np.abs(goal_rows[tiles] - rows) + np.abs(goal_cols[tiles] - cols)
+        if not blank:
+            distance[tiles == 0] = 0
+        return distance.sum(axis=1)
+
+    def estimated_costs(self, states: Sequence[T]) -> np.ndarray:
+        """
+        Returns the estimated costs of many boards, the manhattan distance
+        is computed for the whole stack at once
+        :param states: sequence of states or a stacked array of states
+        :return: array with the cost from each state to the goal
+        """
+        if len(states) == 0:
+            return np.zeros(0, dtype=np.int64)
+        tiles = np.asarray(states).reshape(len(states), -1)
+        if self._heuristic == "manhattan":
+            return self._manhattan_rows(tiles, True)
+        return self.estimated_costs_key([row.astype(np.uint8).tobytes() for row in tiles])
+
+    def estimated_costs_key(self, keys: Sequence[Any]) -> np.ndarray:
+        """
+        Returns the estimated costs of many boards given as keys. The tile
+        distances are vectorized, the line conflicts and walking distance
+        tables are still looked up per board.
+        :param keys: board keys
+        :return: array with the cost from each state to the goal
+        """
+        if self._heuristic == "walking_distance" or len(keys) == 0:
+            return super().estimated_costs_key(keys)
+        tiles = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), -1)
+        if self._heuristic == "manhattan":
+            return self._manhattan_rows(tiles, True)
+        size = self.initial.shape[1]
+        goal_rows, goal_cols = self._goal_lines()
+        costs = self._manhattan_rows(tiles, False)
+        for i, key in enumerate(keys):
+            for line in range(size):
+                costs[i] += (line_conflicts(key, size, goal_rows, goal_cols, line, True) +
+                             line_conflicts(key, size, goal_rows, goal_cols, line, False))
+        return costs
+
+    def estimated_cost_key_from(self, parent_key: Any, parent_cost: float, key: Any):
+        """
+        Updates the parent's estimate for the single tile that moved. Only
+        the manhattan distance of that tile and the lines it left and
+        entered change: a vertical move only affects the row conflicts and
+        the row walking distance, a horizontal move only the column ones.
+        """
+        size = self.initial.shape[1]
+        goal_rows, goal_cols = self._goal_lines()
+        old_blank = parent_key.index(0)
+        new_blank = key.index(0)
+        tile = parent_key[new_blank]
+        vertical = abs(old_blank - new_blank) == size
+
+        def distance(value, pos):
+            return abs(pos // size - goal_rows[value]) + abs(pos % size - goal_cols[value])
+
+        if self._heuristic == "walking_distance":
+            lines = goal_rows if vertical else goal_cols
+            return (parent_cost - walking_distance_part(parent_key, size, lines, lines[0], vertical)
+                    + walking_distance_part(key, size, lines, lines[0], vertical))
+
+        cost = parent_cost + distance(tile, old_blank) - distance(tile, new_blank)
+        if self._heuristic == "linear_conflict":
+            if vertical:
+                changed = {old_blank // size, new_blank // size}
+            else:
+                changed = {old_blank % size, new_blank % size}
+            for line in changed:
+                cost += (line_conflicts(key, size, goal_rows, goal_cols, line, vertical)
+                         - line_conflicts(parent_key, size, goal_rows, goal_cols, line, vertical))
+        else:
+            cost += distance(0, new_blank) - distance(0, old_blank)
+        return cost
+
+
+class GraphProblem(Problem[int]):
+    """
+    Shortest path problem on an explicit sparse graph stored in compressed
+    sparse row (CSR) arrays: the edges leaving vertex v are
+    targets[offsets[v]:offsets[v + 1]] with the same slice of weights.
+    States, keys and actions are all vertex ids, so a path is the list of
+    vertices visited after the initial one. Rows must not repeat a target,
+    csr_from_edges in GraphLoader builds arrays that way.
+    """
+
+    def __init__(self, initial_state: int, goal_state: int, offsets: np.ndarray, targets: np.ndarray,
+                 weights: np.ndarray = None, coordinates: np.ndarray = None):
+        """
+        Initializes a search between two vertices of a CSR graph
+        :param initial_state: vertex the search starts from
+        :param goal_state: vertex to reach
+        :param offsets: int array of length vertices + 1, row v starts at offsets[v]
+        :param targets: int array with the head of every edge
+        :param weights: cost of every edge, None if every edge costs 1
+        :param coordinates: (vertices, 2) positions used for a straight line
+        heuristic, None to estimate 0 everywhere
+        """
+        super().__init__(int(initial_state), int(goal_state))
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        self._coordinates = coordinates
+        if not 0 <= self.initial < self.vertices or not 0 <= self.goal < self.vertices:
+            raise ValueError(f"Initial and goal vertices must be between 0 and {self.vertices - 1}")
+
+    @property
+    def vertices(self) -> int:
+        """number of vertices in the graph"""
+        return len(self._offsets) - 1
+
+    @property
+    def edges(self) -> int:
+        """number of directed edges in the graph"""
+        return len(self._targets)
+
+    @property
+    def heuristic(self) -> str:
+        """name of the heuristic used by estimated_cost"""
+        return "zero" if self._coordinates is None else "straight_line"
+
+    def with_endpoints(self, initial_state: int, goal_state: int) -> GraphProblem:
+        """
+        Returns a problem on the same graph with other endpoints, the
+        arrays are shared instead of copied
+        """
+        return GraphProblem(initial_state, goal_state, self._offsets, self._targets, self._weights,
+                            self._coordinates)
+
+    def neighbors(self, key: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns views of the targets and weights of the edges leaving a vertex
+        :param key: vertex id
+        :return: (targets, weights), weights is None for unweighted graphs
+        """
+        start, stop = self._offsets[key], self._offsets[key + 1]
+        return self._targets[start:stop], None if self._weights is None else self._weights[start:stop]
+
+    def layer_neighbors(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gathers the rows of many vertices with one fancy index into targets
+        :param keys: int array of vertex ids
+        :return: (targets of all their edges, index in keys of each edge's source)
+        """
+        starts = self._offsets[keys]
+        counts = self._offsets[keys + 1] - starts
+        parents = np.repeat(np.arange(len(keys)), counts)
+        # position of every edge inside its row, added to the row start
+        within = np.arange(len(parents)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self._targets[starts[parents] + within], parents
+
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    def expand(self, node: Node) -> List[Node]:
+        return [Node(child, node, action, node.path_cost + cost, node.depth + 1)
+                for action, child, cost in self.successors(node.state)]
+
+    def _actions(self, state: int) -> List[int]:
+        return self.neighbors(state)[0].tolist()
+
+    def _result(self, current_state: int, action: int) -> int:
+        return action
+
+    def _action_cost(self, current: int, action: int, next: int) -> float:
+        targets, weights = self.neighbors(current)
+        if weights is None:
+            return 1
+        return weights[np.flatnonzero(targets == next)[0]].item()
+
+    def hashable_state(self, state: int) -> Any:
+        return state
+
+    def estimated_cost(self, current: int):
+        return self.estimated_cost_key(current)
+
+    # keys are the vertex ids themselves
+    supports_successors = True
+    supports_neighbor_slices = True
+
+    def state_key(self, state: int) -> Any:
+        return state
+
+    def key_state(self, key: Any) -> int:
+        return key
+
+    def successors(self, key: Any) -> Iterable[Tuple[int, Any, float]]:
+        """
+        Returns the edges leaving a vertex, read from one slice of each array
+        :param key: vertex id
+        :return: list of (vertex moved to, vertex moved to, edge weight)
+        """
+        targets, weights = self.neighbors(key)
+        targets = targets.tolist()
+        if weights is None:
+            return [(target, target, 1) for target in targets]
+        return list(zip(targets, targets, weights.tolist()))
+
+    def _heuristic_scale(self) -> float:
+        """
+        Largest factor that keeps the straight line distance admissible: the
+        smallest ratio of edge weight to edge length over the whole graph
+        """
+        if getattr(self, "_scale", None) is None:
+            sources = np.repeat(np.arange(self.vertices), np.diff(self._offsets))
+            lengths = np.hypot(*(self._coordinates[self._targets] - self._coordinates[sources]).T)
+            weights = np.ones(self.edges) if self._weights is None else self._weights
+            positive = lengths > 0
+            self._scale = float(np.min(weights[positive] / lengths[positive])) if positive.any() else 0.0
+        return self._scale
+
+    def estimated_cost_key(self, key: Any):
+        """
+        Returns the straight line distance to the goal scaled by _heuristic_scale,
+        or 0 when the graph has no coordinates
+        :param key: vertex id
+        :return: cost from current state to the goal
+        """
+        if self._coordinates is None:
+            return 0
+        x, y = self._coordinates[key].tolist()
+        goal_x, goal_y = self._coordinates[self.goal].tolist()
+        return math.hypot(x - goal_x, y - goal_y) * self._heuristic_scale()
+
+    def estimated_costs_key(self, keys: Sequence[Any]) -> np.ndarray:
+        """
+        Returns the straight line distances of many vertices with one array operation
+        :param keys: vertex ids
+        :return: array with the cost from each vertex to the goal
+        """
+        if self._coordinates is None:
+            return np.zeros(len(keys))
+        if len(keys) <= SMALL_BATCH:
+            return np.array([self.estimated_cost_key(key) for key in keys], dtype=np.float64)
+        offset = self._coordinates[np.asarray(keys, dtype=np.int64)] - self._coordinates[self.goal]
+        return np.hypot(offset[:, 0], offset[:, 1]) * self._heuristic_scale()
+
+    def estimated_costs(self, states: Sequence[int]) -> np.ndarray:
+        return self.estimated_costs_key(states)
@@ -0,0 +1,191 @@
+"""
+Corpus of solvable sliding puzzle instances with known optimal solution
+lengths. Instances are made by random walks from the goal and kept once a
+solver confirms their optimal length, so every instance is solvable and
+benchmarks can check that optimal searches return paths of that length.
+
+Usage:
+    python PuzzleCorpus.py generate [--size N] [--lengths L ...] [--per-length K] [--seed S] [--out FILE]
+    python PuzzleCorpus.py list [FILE]
+"""
+import argparse
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+from InformedSearch import a_star
+from Problem import SlidingPuzzle
+from PuzzleTable import SolutionTable
+from SearchControl import SearchLimits
+
+# bumped whenever the layout of corpus files changes
+CORPUS_VERSION = 1
+
+# names of the difficulty bands, each covers an equal share of the target lengths
+BANDS = ["easy", "medium", "hard"]
+
+
+def corpus_filename(size: int) -> str:
+    """default corpus file for N x N puzzles"""
+    return f"puzzle_corpus_{size}x{size}.json"
+
+
+def goal_board(size: int) -> np.ndarray:
+    """solved board with the blank in the bottom right corner, as used by main.py"""
+    goal = np.arange(1, size * size + 1).reshape((size, size))
+    goal[size - 1][size - 1] = 0
+    return goal
+
+
+def random_walk(problem: SlidingPuzzle, key: bytes, steps: int, rng: np.random.Generator) -> bytes:
+    """
+    Moves the blank steps times at random from the given board, never
+    undoing the previous move
+    :return: key of the board reached
+    """
+    previous = None
+    for _ in range(steps):
+        children = [child for _, child, _ in problem.successors(key) if child != previous]
+        previous, key = key, children[rng.integers(len(children))]
+    return key
+
+
+def optimal_length(problem: SlidingPuzzle, key: bytes, table: SolutionTable = None,
+                   time_limit: float = 60) -> int:
+    """
+    Optimal solution length of a board, read from the solution table when
+    there is one and found with A* and the walking distance otherwise
+    :return: number of moves or -1 if it could not be verified in time
+    """
+    state = problem.key_state(key)
+    if table is not None:
+        return table.distance(state)
+    verifier = SlidingPuzzle(state, problem.goal, "walking_distance")
+    result = a_star(verifier, limits=SearchLimits(time_limit=time_limit))
+    return len(result) if result.solved else -1
+
+
+def difficulty_bands(lengths: List[int]) -> Dict[str, List[int]]:
+    """
+    Splits the sorted target lengths into BANDS of about equal size
+    :return: band name -> [shortest, longest] optimal length in the band
+    """
+    lengths = sorted(set(lengths))
+    bands = {}
+    for i, name in enumerate(BANDS):
+        part = lengths[len(lengths) * i // len(BANDS):len(lengths) * (i + 1) // len(BANDS)]
+        if part:
+            bands[name] = [part[0], part[-1]]
+    return bands
+
+
+def generate_corpus(size: int, lengths: List[int], per_length: int = 5, seed: int = 0,
+                    max_attempts: int = 20000) -> Dict[str, Any]:
+    """
+    Generates instances with the given optimal lengths. Walks of random
+    length are verified and kept whenever their optimal length is still
+    needed, so no verification is wasted.
+    :param size: width of the puzzle
+    :param lengths: optimal solution lengths wanted
+    :param per_length: instances wanted for each length
+    :param seed: seed of the random walks, the same seed gives the same corpus
+    :param max_attempts: walks tried before giving up on the missing lengths
+    :return: corpus ready to be saved with save_corpus
+    """
+    rng = np.random.default_rng(seed)
+    goal = goal_board(size)
+    problem = SlidingPuzzle(goal, goal)
+    goal_key = problem.state_key(goal)
+    table = SolutionTable(goal) if size == 3 else None
+
+    needed = {length: per_length for length in lengths}
+    found = {length: [] for length in lengths}
+    seen = set()
+    for _ in range(max_attempts):
+        if not any(needed.values()):
+            break
+        # a walk is never shorter than the optimal solution it leads to, and
+        # walks up to twice the target keep the verification searches small
+        target = int(rng.choice([length for length, count in needed.items() if count]))
+        key = random_walk(problem, goal_key, int(rng.integers(target, 2 * target + 2)), rng)
+        if key in seen:
+            continue
+        seen.add(key)
+        length = optimal_length(problem, key, table)
+        if needed.get(length):
+            needed[length] -= 1
+            found[length].append(list(key))
+
+    instances = []
+    for length in sorted(found):
+        for board in found[length]:
+            instances.append({"id": f"{size}x{size}-{length}-{len(instances)}", "board": board, "optimal": length})
+    return {"version": CORPUS_VERSION, "size": size, "goal": goal.ravel().tolist(), "seed": seed,
+            "bands": difficulty_bands([i["optimal"] for i in instances]), "instances": instances}
+
+
+def save_corpus(corpus: Dict[str, Any], filename: str):
+    with open(filename, "w") as f:
+        json.dump(corpus, f, indent=1)
+
+
+def load_corpus(filename: str) -> Dict[str, Any]:
+    """
+    Reads a corpus file, raising ValueError if it was written by an
+    incompatible version
+    """
+    with open(filename) as f:
+        corpus = json.load(f)
+    if corpus.get("version") != CORPUS_VERSION:
+        raise ValueError(f"{filename} is corpus version {corpus.get('version')}, expected {CORPUS_VERSION}")
+    return corpus
+
+
+def select(corpus: Dict[str, Any], band: str = None, min_length: int = 0,
+           max_length: int = None) -> List[Dict[str, Any]]:
+    """
+    Returns the instances of a difficulty band and/or a range of optimal lengths
+    :param band: one of BANDS, None for all
+    """
+    if band is not None:
+        if band not in corpus["bands"]:
+            raise ValueError(f"Unknown band {band}, the corpus has {list(corpus['bands'])}")
+        low, high = corpus["bands"][band]
+        min_length, max_length = max(min_length, low), high if max_length is None else min(max_length, high)
+    return [i for i in corpus["instances"]
+            if i["optimal"] >= min_length and (max_length is None or i["optimal"] <= max_length)]
+
+
+def instance_problem(corpus: Dict[str, Any], instance: Dict[str, Any], heuristic: str = "manhattan") -> SlidingPuzzle:
+    """builds the SlidingPuzzle of a corpus instance"""
+    shape = (corpus["size"], corpus["size"])
+    return SlidingPuzzle(np.array(instance["board"]).reshape(shape), np.array(corpus["goal"]).reshape(shape),
+                         heuristic)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate or list sliding puzzle corpora")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="generate a corpus")
+    generate.add_argument("--size", type=int, default=3)
+    generate.add_argument("--lengths", type=int, nargs="+", default=list(range(2, 31, 2)),
+                          help="optimal lengths wanted")
+    generate.add_argument("--per-length", type=int, default=5, help="instances for each length")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--out", help="corpus file, puzzle_corpus_NxN.json by default")
+    listing = commands.add_parser("list", help="show the instances of a corpus")
+    listing.add_argument("file", nargs="?", default=corpus_filename(3))
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        corpus = generate_corpus(args.size, args.lengths, args.per_length, args.seed)
+        filename = args.out or corpus_filename(args.size)
+        save_corpus(corpus, filename)
+        missing = len(args.lengths) * args.per_length - len(corpus["instances"])
+        print(f"Saved {len(corpus['instances'])} instances to {filename}" +
+              (f", {missing} could not be generated" if missing else ""))
+    else:
+        corpus = load_corpus(args.file)
+        for name, (low, high) in corpus["bands"].items():
+            print(f"{name}: lengths {low}-{high}, {len(select(corpus, name))} instances")
@@ -0,0 +1,112 @@
+import bisect
+import collections
+from typing import Sequence
+
+# walking distance tables already built, keyed by (size, goal line of the blank)
+_wd_tables = {}
+
+
+def _longest_increasing(values: Sequence[int]) -> int:
+    """length of the longest strictly increasing subsequence"""
+    tails = []
+    for v in values:
+        i = bisect.bisect_left(tails, v)
+        if i == len(tails):
+            tails.append(v)
+        else:
+            tails[i] = v
+    return len(tails)
+
+
+def line_conflicts(key: bytes, size: int, goal_rows: list, goal_cols: list, line: int, by_row: bool) -> int:
+    """
+    Extra moves caused by tiles that are in their goal row (or column) but
+    in the wrong order. Every tile that has to leave the line to let the
+    others pass costs two moves, and at least len - longest increasing
+    subsequence of them have to leave.
+    :param key: tiles in row major order, 0 is the blank
+    :param line: index of the row or column
+    :param by_row: true for a row, false for a column
+    :return: number of extra moves for this line
+    """
+    if by_row:
+        members = [goal_cols[v] for v in key[line * size:(line + 1) * size] if v and goal_rows[v] == line]
+    else:
+        members = [goal_rows[v] for v in key[line::size] if v and goal_cols[v] == line]
+    if len(members) < 2:
+        return 0
+    return 2 * (len(members) - _longest_increasing(members))
+
+
+def tile_manhattan(key: bytes, size: int, goal_rows: list, goal_cols: list) -> int:
+    """sum of the manhattan distances of every tile except the blank"""
+    distance = 0
+    for pos, v in enumerate(key):
+        if v:
+            distance += abs(pos // size - goal_rows[v]) + abs(pos % size - goal_cols[v])
+    return distance
+
+
+def linear_conflict(key: bytes, size: int, goal_rows: list, goal_cols: list) -> int:
+    """manhattan distance plus the linear conflicts of every row and column"""
+    distance = tile_manhattan(key, size, goal_rows, goal_cols)
+    for line in range(size):
+        distance += line_conflicts(key, size, goal_rows, goal_cols, line, True)
+        distance += line_conflicts(key, size, goal_rows, goal_cols, line, False)
+    return distance
+
+
+def walking_distance_table(size: int, blank_line: int) -> dict:
+    """
+    Builds, or returns the cached, walking distance table. A pattern counts,
+    for every row, how many of its tiles belong to each goal row. The blank
+    moves a tile from a neighboring row into its own row with every move,
+    and a breadth first search from the goal pattern gives the exact number
+    of such moves for every pattern.
+    :param size: width of the puzzle
+    :param blank_line: goal row of the blank
+    :return: dictionary from pattern (tuple of row tuples) to moves
+    """
+    if (size, blank_line) in _wd_tables:
+        return _wd_tables[(size, blank_line)]
+
+    goal = tuple(tuple((size - (r == blank_line)) if r == g else 0 for g in range(size)) for r in range(size))
+    table = {goal: 0}
+    frontier = collections.deque([(goal, blank_line)])
+    while frontier:
+        pattern, blank = frontier.popleft()
+        distance = table[pattern] + 1
+        for other in (blank - 1, blank + 1):
+            if not 0 <= other < size:
+                continue
+            for g in range(size):
+                if pattern[other][g]:
+                    rows = [list(r) for r in pattern]
+                    rows[other][g] -= 1
+                    rows[blank][g] += 1
+                    child = tuple(tuple(r) for r in rows)
+                    if child not in table:
+                        table[child] = distance
+                        frontier.append((child, other))
+
+    _wd_tables[(size, blank_line)] = table
+    return table
+
+
+def walking_distance_part(key: bytes, size: int, goal_lines: list, blank_line: int, by_row: bool) -> int:
+    """
+    Walking distance of the rows (by_row) or of the columns of a state
+    :param goal_lines: goal row (or column) of every tile
+    :param blank_line: goal row (or column) of the blank
+    """
+    counts = [[0] * size for _ in range(size)]
+    for pos, v in enumerate(key):
+        if v:
+            counts[pos // size if by_row else pos % size][goal_lines[v]] += 1
+    return walking_distance_table(size, blank_line)[tuple(tuple(r) for r in counts)]
+
+
+def walking_distance(key: bytes, size: int, goal_rows: list, goal_cols: list) -> int:
+    """walking distance of the rows plus walking distance of the columns"""
+    return (walking_distance_part(key, size, goal_rows, goal_rows[0], True) +
+            walking_distance_part(key, size, goal_cols, goal_cols[0], False))
@@ -0,0 +1,118 @@
+import os
+from typing import List
+
+import numpy as np
+
+from PackedPuzzle import blank_moves, pack_boards, packed_layers, unpack_boards
+from Problem import SlidingPuzzle
+from StateIndex import PermutationIndexer
+
+# marks states that cannot reach the goal (the other half of the permutations)
+UNREACHABLE = 0xFF
+
+
+def table_filename(goal_state: np.ndarray) -> str:
+    """
+    Returns the default file the table for the given goal is stored in,
+    next to this module
+    :param goal_state: goal state of the puzzle
+    :return: path of the table file
+    """
+    name = "puzzle_table_" + "".join(str(int(v)) for v in goal_state.ravel()) + ".npy"
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+
+def build_table(goal_state: np.ndarray) -> np.ndarray:
+    """
+    Runs a breadth first search backwards from the goal over the whole
+    state space and returns one byte per ranked state holding the optimal
+    distance to the goal in the upper bits and the first move of an
+    optimal path in the lower two bits. Layers are swept as packed boards
+    and ranked with array operations, see PackedPuzzle.
+    :param goal_state: goal state of a 3x3 puzzle
+    :return: uint8 array indexed by the Lehmer rank of a state
+    """
+    size = goal_state.shape[0]
+    indexer = PermutationIndexer(goal_state.size)
+    table = np.full(indexer.size, UNREACHABLE, dtype=np.uint8)
+
+    for distance, layer, codes in packed_layers(pack_boards(goal_state.reshape(1, -1)), size):
+        ranks = indexer.rank_many(unpack_boards(layer, goal_state.size))
+        # from a board the opposite of the move that reached it leads back towards the goal
+        table[ranks] = (distance << 2) | ((codes.astype(np.int64) + 2) % 4 if distance else 0)
+    return table
+
+
+class SolutionTable:
+    """
+    Complete solution table for the 3x3 sliding puzzle. The table is built
+    once, saved to disk and memory mapped afterwards, so a query walks the
+    stored moves and costs time proportional to the path length.
+    """
+
+    def __init__(self, goal_state: np.ndarray, filename: str = None):
+        """
+        Loads the table for the goal state, building and saving it first if
+        the file does not exist yet.
+        :param goal_state: goal state of a 3x3 puzzle
+        :param filename: where the table is stored, defaults to table_filename
+        """
+        if goal_state.shape != (3, 3):
+            raise ValueError("Solution tables are only available for the 3x3 puzzle")
+        self._goal = goal_state
+        self._filename = table_filename(goal_state) if filename is None else filename
+        self._indexer = PermutationIndexer(goal_state.size)
+        self._moves = blank_moves(goal_state.shape[0])
+
+        if not os.path.exists(self._filename):
+            self._save(build_table(goal_state))
+        self._table = np.load(self._filename, mmap_mode="r")
+
+    def _save(self, table: np.ndarray):
+        """
+        Writes the table to a temporary file of this process and moves it in
+        place atomically, so a build that is killed or runs at the same time
+        in another worker never leaves a truncated table behind
+        """
+        temporary = f"{self._filename}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                np.save(f, table)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self._filename)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def distance(self, state: np.ndarray) -> int:
+        """
+        Returns the optimal number of moves from the state to the goal or -1
+        if the goal cannot be reached
+        :param state: 3x3 puzzle state
+        :return: optimal distance
+        """
+        entry = int(self._table[self._indexer.rank(state.ravel().tolist())])
+        return -1 if entry == UNREACHABLE else entry >> 2
+
+    def solve(self, state: np.ndarray) -> List[str]:
+        """
+        Returns an optimal list of actions from the state to the goal or an
+        empty list if the goal cannot be reached
+        :param state: 3x3 puzzle state
+        :return: List of actions encoded as Strings
+        """
+        current = [int(v) for v in state.ravel()]
+        entry = int(self._table[self._indexer.rank(current)])
+        if entry == UNREACHABLE:
+            return []
+
+        path = []
+        while entry >> 2:
+            code = entry & 3
+            blank = current.index(0)
+            pos = next(p for c, p in self._moves[blank] if c == code)
+            current[blank], current[pos] = current[pos], 0
+            path.append(SlidingPuzzle.ACTIONS[code])
+            entry = int(self._table[self._indexer.rank(current)])
+        return path
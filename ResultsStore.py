@@ -0,0 +1,229 @@
+"""
+Append-only store of search runs. Every run is one JSON object per line
+holding its metadata (algorithm, problem parameters, machine and git
+revision), its measurements and its path, run-length encoded so a path of
+50 easts is stored as "east×50".
+
+Usage:
+    python ResultsStore.py summarize [FILE] [--by FIELD ...]
+    python ResultsStore.py import-csv CSV_FILE [FILE]
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+from typing import Any, Dict, Iterator, List
+
+RESULTS_FILE = "searchResults.jsonl"
+
+# separates an action from its repeat count in an encoded path
+REPEAT = "×"
+
+# run names used by main.py, "A*_3" is A* on maze 3
+ALGORITHMS = {"DFS": "d", "BFS": "b", "A*": "a", "Greedy": "g", "Bidirectional": "s", "Frontier": "f",
+              "ARA*": "n", "Beam": "w", "SMA*": "m", "HPA*": "h", "ParallelBFS": "p",
+              "BDS": "s"}
+
+_git_revision = None
+
+
+def encode_path(path: List[str]) -> str:
+    """
+    Run-length encodes a path, e.g. ["east", "east", "south"] is "east×2 south".
+    Vertex ids of graph paths are written as numbers.
+    """
+    runs = []
+    for action, group in itertools.groupby(path):
+        count = len(list(group))
+        runs.append(str(action) if count == 1 else f"{action}{REPEAT}{count}")
+    return " ".join(runs)
+
+
+def decode_path(encoded: str) -> List[str]:
+    """Inverse of encode_path"""
+    path = []
+    for run in encoded.split():
+        action, _, count = run.partition(REPEAT)
+        path.extend([action] * (int(count) if count else 1))
+    return path
+
+
+def git_revision() -> str:
+    """short hash of the checked out commit, with + appended if the tree has changes"""
+    global _git_revision
+    if _git_revision is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        try:
+            rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=directory,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+            dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                   capture_output=True, text=True, check=True).stdout.strip()
+            _git_revision = rev + ("+" if dirty else "")
+        except (OSError, subprocess.CalledProcessError):
+            _git_revision = "unknown"
+    return _git_revision
+
+
+def machine() -> Dict[str, Any]:
+    """host, platform and interpreter the runs were measured on"""
+    return {"host": platform.node(), "platform": platform.platform(), "processor": platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version()}
+
+
+def path_metrics(path: List[str]) -> Dict[str, Any]:
+    """
+    Structural metrics of a path that are cheap to compare between runs
+    :return: number of straight runs and of turns, and the count of each action
+    """
+    runs = sum(1 for _ in itertools.groupby(path))
+    counts = {}
+    for action in path:
+        counts[action] = counts.get(action, 0) + 1
+    return {"runs": runs, "turns": max(0, runs - 1), "actions": counts}
+
+
+class ResultsStore:
+    """
+    JSON lines file that runs are appended to and never rewritten, so the
+    history of every session is kept and files are cheap to parse.
+    """
+
+    def __init__(self, filename: str = RESULTS_FILE):
+        """
+        :param filename: file the runs are appended to, created on the first append
+        """
+        self.filename = filename
+        self._machine = None
+
+    def append(self, record: Dict[str, Any]):
+        """appends one record as a line of JSON"""
+        with open(self.filename, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def append_run(self, run: str, algorithm: str, problem: str, params: Dict[str, Any], stats: List[float],
+                   path: List[str]) -> Dict[str, Any]:
+        """
+        Appends the result of one search
+        :param run: name of the run, e.g. "A*_3"
+        :param algorithm: menu letter of the algorithm
+        :param problem: "maze" or "puzzle"
+        :param params: parameters of the problem, e.g. the maze number or puzzle size
+        :param stats: memory, time and path length as returned by run_test and run_puzzle
+        :param path: path found, a SearchResult also stores its status and nodes expanded
+        :return: the record that was written
+        """
+        if self._machine is None:
+            self._machine = machine()
+        record = {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "run": run,
+            "algorithm": algorithm,
+            "problem": problem,
+            "params": params,
+            "memory": stats[0],
+            "time": stats[1],
+            "path_length": stats[2],
+            "status": getattr(path, "status", "solved" if len(path) > 0 else "no_path"),
+            "nodes_expanded": getattr(path, "nodes_expanded", None),
+            "metrics": path_metrics(path),
+            "path": encode_path(path),
+            "git": git_revision(),
+            "machine": self._machine,
+        }
+        self.append(record)
+        return record
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """reads the runs back one at a time, skipping a partly written last line"""
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def summarize(self, by: List[str] = ("run",)) -> List[Dict[str, Any]]:
+        """
+        Aggregates the runs grouped by the given record fields
+        :param by: fields to group by, e.g. ["algorithm", "git"]
+        :return: one row per group with the number of runs and the mean,
+        minimum and maximum of time and memory
+        """
+        groups = {}
+        for record in self.records():
+            group = tuple(json.dumps(record.get(field), sort_keys=True) for field in by)
+            groups.setdefault(group, []).append(record)
+
+        rows = []
+        for group, records in groups.items():
+            row = {field: json.loads(value) for field, value in zip(by, group)}
+            row["runs"] = len(records)
+            for field in ("time", "memory"):
+                values = [r[field] for r in records if r.get(field) is not None]
+                row[field] = (statistics.mean(values), min(values), max(values)) if values else None
+            lengths = {r["path_length"] for r in records}
+            row["path_length"] = lengths.pop() if len(lengths) == 1 else sorted(lengths)
+            nodes = [r["nodes_expanded"] for r in records if r.get("nodes_expanded") is not None]
+            row["nodes_expanded"] = statistics.mean(nodes) if nodes else None
+            rows.append(row)
+        return rows
+
+    def import_csv(self, csv_filename: str) -> int:
+        """
+        Appends the runs of a searchResults.csv file written by older
+        versions of main.py, which stored the path across many columns
+        :return: number of runs imported
+        """
+        count = 0
+        with open(csv_filename, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if not row or not row[0]:
+                    continue
+                name, _, maze = row[0].rpartition("_")
+                path = [a for a in row[4:] if a]
+                stats = [float(row[1]), float(row[2]), int(float(row[3]))]
+                params = {"maze": int(maze)} if maze.isdigit() else {}
+                self.append_run(row[0], ALGORITHMS.get(name, name), "maze", params, stats, path)
+                count += 1
+        return count
+
+
+def _format_row(row: Dict[str, Any], by: List[str]) -> str:
+    columns = [str(row[field]) for field in by]
+    columns.append(f"runs={row['runs']}")
+    if row["time"] is not None:
+        columns.append("time={:.4f}s [{:.4f}, {:.4f}]".format(*row["time"]))
+    if row["memory"] is not None:
+        columns.append("memory={:.2e} [{:.2e}, {:.2e}]".format(*row["memory"]))
+    columns.append(f"length={row['path_length']}")
+    if row["nodes_expanded"] is not None:
+        columns.append(f"nodes={row['nodes_expanded']:.0f}")
+    return "  ".join(columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize or import stored search runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summarize = commands.add_parser("summarize", help="aggregate the stored runs")
+    summarize.add_argument("file", nargs="?", default=RESULTS_FILE)
+    summarize.add_argument("--by", nargs="+", default=["run"], help="record fields to group by")
+    convert = commands.add_parser("import-csv", help="append the runs of an old CSV results file")
+    convert.add_argument("csv_file")
+    convert.add_argument("file", nargs="?", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.file)
+    if args.command == "summarize":
+        for summary in store.summarize(args.by):
+            print(_format_row(summary, args.by))
+    else:
+        print(f"Imported {store.import_csv(args.csv_file)} runs into {args.file}")
@@ -0,0 +1,139 @@
+import collections
+import os
+import pickle
+import threading
+from typing import Any, Dict
+
+from Problem import Problem
+
+# bumped whenever the layout of snapshot files changes
+CHECKPOINT_VERSION = 2
+
+
+def _copy(structure: Any) -> Any:
+    """
+    Shallow copy of a search structure taken before it is handed to the
+    writer thread, frontiers become lists and other values are kept as they are
+    """
+    if isinstance(structure, dict):
+        return dict(structure)
+    if isinstance(structure, (list, collections.deque)):
+        return list(structure)
+    return structure
+
+
+def _signature(search: str, problem: Problem) -> Dict[str, Any]:
+    """
+    What a snapshot must match to be resumed: the search, the problem type,
+    the initial and goal keys and the heuristic, which decides the priorities
+    saved in the frontier of A* and greedy search
+    """
+    return {"search": search, "problem": type(problem).__name__,
+            "initial": problem.state_key(problem.initial), "goal": problem.state_key(problem.goal),
+            "heuristic": getattr(problem, "heuristic", None)}
+
+
+class SearchCheckpoint:
+    """
+    Periodic snapshots of the frontier, reached table and counters of a
+    search over the successor interface, so a search that was stopped or
+    killed can resume exactly where the last snapshot was taken. The
+    search thread only takes shallow copies of its structures, pickling
+    and writing happen on a background thread and the file is replaced
+    atomically, so a crash while writing keeps the previous snapshot.
+    """
+
+    def __init__(self, filename: str, interval: int = 100000, resume: bool = True):
+        """
+        :param filename: file the snapshots are written to and resumed from
+        :param interval: number of node expansions between snapshots
+        :param resume: continue from an existing snapshot instead of overwriting it
+        """
+        self.filename = filename
+        self.interval = max(1, interval)
+        self.resume_existing = resume
+        self.snapshots = 0
+        self._saved_at = 0
+        self._writer = None
+        self._error = None
+
+    def resume(self, search: str, problem: Problem) -> Any:
+        """
+        Reads the snapshot of a search, raising ValueError if it was taken by
+        another search, problem, goal, heuristic or version
+        :param search: name of the search, e.g. "a_star"
+        :param problem: problem being searched
+        :return: structures and counters saved by the search or None to start afresh
+        """
+        self._saved_at = 0
+        if not self.resume_existing or not os.path.exists(self.filename):
+            return None
+        with open(self.filename, "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"{self.filename} is checkpoint version {snapshot.get('version')}, "
+                             f"expected {CHECKPOINT_VERSION}")
+        expected = _signature(search, problem)
+        for field, value in expected.items():
+            if snapshot[field] != value:
+                raise ValueError(f"{self.filename} was taken with {field} {snapshot[field]!r}, "
+                                 f"not {value!r} as in this search")
+        self._saved_at = snapshot["state"]["nodes_expanded"]
+        return snapshot["state"]
+
+    def due(self, nodes_expanded: int) -> bool:
+        """
+        Returns true if interval nodes were expanded since the last snapshot
+        and the previous snapshot has been written
+        """
+        return (nodes_expanded - self._saved_at >= self.interval and
+                (self._writer is None or not self._writer.is_alive()))
+
+    def save(self, search: str, problem: Problem, wait: bool = False, **state: Any):
+        """
+        Takes a snapshot of the search, e.g. save("bfs", problem, frontier=frontier,
+        reached=reached, nodes_expanded=n). Dictionaries and frontiers are
+        copied before returning so the search can go on changing them.
+        :param wait: block until the snapshot is on disk, used when the search stops
+        """
+        self.wait()
+        snapshot = dict(_signature(search, problem), version=CHECKPOINT_VERSION,
+                        state={name: _copy(value) for name, value in state.items()})
+        self._saved_at = state["nodes_expanded"]
+        self.snapshots += 1
+        self._writer = threading.Thread(target=self._write, args=(snapshot,), daemon=True)
+        self._writer.start()
+        if wait:
+            self.wait()
+
+    def _write(self, snapshot: Dict[str, Any]):
+        temporary = self.filename + ".tmp"
+        try:
+            with open(temporary, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.filename)
+        except OSError as error:
+            self._error = error
+
+    def wait(self):
+        """Blocks until the snapshot being written is on disk and raises its write error if any"""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def finish(self, complete: bool):
+        """
+        Called when the search returns. The snapshot of a search that ran to
+        completion is removed so running it again starts afresh.
+        :param complete: the search found a path or proved there is none
+        """
+        self.wait()
+        if complete:
+            for filename in (self.filename, self.filename + ".tmp"):
+                if os.path.exists(filename):
+                    os.remove(filename)
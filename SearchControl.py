@@ -0,0 +1,199 @@
+import threading
+import time
+from typing import Any, List
+
+# status of a finished search
+SOLVED = "solved"
+NO_PATH = "no_path"
+TIMEOUT = "timeout"
+NODE_BUDGET = "node_budget"
+CANCELLED = "cancelled"
+
+
+class CancellationToken:
+    """
+    Flag shared between a running search and another thread that
+    wants to stop it.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Asks every search using this token to stop"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """returns true once cancel has been called"""
+        return self._event.is_set()
+
+
+class SearchResult(list):
+    """
+    List of actions returned by a search that was given SearchLimits. It
+    holds a complete path whenever one was found, so it can be used
+    anywhere a plain path is expected, and carries the search statistics.
+    """
+
+    def __init__(self, path: List[str], status: str, nodes_expanded: int, elapsed: float,
+                 best_so_far: List[str] = None, bound: float = None):
+        super().__init__(path)
+        self.status = status
+        self.nodes_expanded = nodes_expanded
+        self.elapsed = elapsed
+        # partial path towards the most promising state when no path was found
+        self.best_so_far = list(path) if best_so_far is None else best_so_far
+        # suboptimality bound of the path for anytime searches
+        self.bound = bound
+
+    @property
+    def solved(self) -> bool:
+        """returns true if the search finished with a path"""
+        return self.status == SOLVED
+
+
+class SearchInterrupted(Exception):
+    """
+    Raised inside searches with nested helpers to unwind to the
+    public search function once a limit is reached.
+    """
+
+    def __init__(self, status: str):
+        super().__init__(status)
+        self.status = status
+
+
+class SearchLimits:
+    """
+    Wall clock, node budget and cancellation limits for a search. Searches
+    call expanded for every node they expand and stop as soon as it
+    returns a status. They also register their reached tables and
+    frontiers with track so a MemoryMonitor can sample their sizes, and
+    the searches that support it snapshot themselves to a SearchCheckpoint.
+    """
+
+    def __init__(self, time_limit: float = None, deadline: float = None, max_nodes: int = None,
+                 cancel: CancellationToken = None, check_interval: int = 256, memory: Any = None,
+                 checkpoint: Any = None):
+        """
+        :param time_limit: seconds the search may run for, counted from start
+        :param deadline: absolute time.monotonic() value the search must stop at
+        :param max_nodes: maximum number of nodes to expand
+        :param cancel: token that stops the search when cancelled
+        :param check_interval: how many nodes to expand between clock and cancel checks
+        :param memory: MemoryMonitor that samples the structures of the search
+        :param checkpoint: SearchCheckpoint the search is resumed from and snapshotted to,
+        supported by breadth_first_search, a_star and greedy on the successor interface
+        """
+        self._time_limit = time_limit
+        self._deadline = deadline
+        self._max_nodes = max_nodes
+        self._cancel = cancel
+        self._check_interval = max(1, check_interval)
+        self.memory = memory
+        self.checkpoint = checkpoint
+        self.start()
+
+    def start(self):
+        """Resets the counters, called by a search before it begins"""
+        self._start = time.monotonic()
+        self._stop_at = self._deadline
+        if self._time_limit is not None:
+            stop_at = self._start + self._time_limit
+            self._stop_at = stop_at if self._stop_at is None else min(self._stop_at, stop_at)
+        self.nodes_expanded = 0
+        self.status = None
+        if self.memory is not None:
+            self.memory.start()
+
+    @property
+    def elapsed(self) -> float:
+        """seconds since the search started"""
+        return time.monotonic() - self._start
+
+    def expanded(self) -> Any:
+        """
+        Counts one node expansion and checks the limits. A node refused
+        because a limit was reached is not counted, so a search stopped by
+        max_nodes reports exactly max_nodes nodes expanded.
+        :return: status of the limit that was reached or None to keep searching
+        """
+        if self._max_nodes is not None and self.nodes_expanded >= self._max_nodes:
+            self.status = NODE_BUDGET
+            return self.status
+        self.nodes_expanded += 1
+        if self.nodes_expanded % self._check_interval == 0:
+            if self._cancel is not None and self._cancel.cancelled:
+                self.status = CANCELLED
+            elif self._stop_at is not None and time.monotonic() >= self._stop_at:
+                self.status = TIMEOUT
+        if self.memory is not None and self.nodes_expanded % self.memory.interval == 0:
+            self.memory.sample()
+        if self.status is not None:
+            self.nodes_expanded -= 1
+        return self.status
+
+    def expanded_many(self, count: int) -> Any:
+        """
+        Counts the expansion of a whole layer of nodes at once, for searches
+        that expand layers with array operations. The clock and the cancel
+        token are checked on every call. A refused layer is not counted.
+        :param count: number of nodes in the layer
+        :return: status of the limit that was reached or None to keep searching
+        """
+        if self._max_nodes is not None and self.nodes_expanded + count > self._max_nodes:
+            self.status = NODE_BUDGET
+        elif self._cancel is not None and self._cancel.cancelled:
+            self.status = CANCELLED
+        elif self._stop_at is not None and time.monotonic() >= self._stop_at:
+            self.status = TIMEOUT
+        if self.status is not None:
+            return self.status
+        before = self.nodes_expanded
+        self.nodes_expanded += count
+        if self.memory is not None and self.nodes_expanded // self.memory.interval > before // self.memory.interval:
+            self.memory.sample()
+        return self.status
+
+    def track(self, **structures: Any):
+        """
+        Registers the data structures of a search with the memory monitor,
+        e.g. track(reached=reached, frontier=frontier). Structures with frontier
+        in their name only reference states owned by the reached tables.
+        """
+        if self.memory is not None:
+            for name, structure in structures.items():
+                self.memory.track(name, structure, owner="frontier" not in name)
+
+    def check(self):
+        """
+        Counts one node expansion and raises SearchInterrupted if a limit was reached
+        """
+        if self.expanded() is not None:
+            raise SearchInterrupted(self.status)
+
+    def result(self, status: str, path: List[str], best_so_far: List[str] = None,
+               bound: float = None) -> SearchResult:
+        """
+        Builds the SearchResult for a search that stopped with the given status
+        """
+        if self.memory is not None:
+            self.memory.finish()
+        if self.checkpoint is not None:
+            self.checkpoint.finish(status in (SOLVED, NO_PATH))
+        return SearchResult(path, status, self.nodes_expanded, self.elapsed, best_so_far, bound)
+
+
+def solved(limits: SearchLimits, path: List[str]) -> Any:
+    """
+    Returns the path found by a search, as a SearchResult if the search has limits
+    """
+    return path if limits is None else limits.result(SOLVED, path)
+
+
+def no_path(limits: SearchLimits) -> Any:
+    """
+    Returns the empty path of a search that failed, as a SearchResult if the search has limits
+    """
+    return [] if limits is None else limits.result(NO_PATH, [])
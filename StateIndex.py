@@ -0,0 +1,98 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class PermutationIndexer:
+    """
+    Perfect hash for permutations of the numbers 0 to n - 1. A permutation
+    is mapped to its Lehmer rank, its position in lexicographic order, so
+    the n! permutations map onto 0 to n! - 1 without collisions. This lets
+    search tables be flat arrays indexed by rank instead of dictionaries.
+    """
+
+    def __init__(self, n: int):
+        """
+        Creates an indexer for permutations of length n
+        :param n: number of elements in each permutation
+        """
+        self._n = n
+        self._factorials = [1] * (n + 1)
+        for i in range(1, n + 1):
+            self._factorials[i] = self._factorials[i - 1] * i
+
+    @property
+    def n(self) -> int:
+        """number of elements in each permutation"""
+        return self._n
+
+    @property
+    def size(self) -> int:
+        """number of distinct ranks (n!)"""
+        return self._factorials[self._n]
+
+    def rank(self, permutation: Sequence[int]) -> int:
+        """
+        Returns the Lehmer rank of the permutation in O(n). The number of
+        smaller values still unused at each position is the popcount of a
+        bit mask instead of a scan over the remaining values.
+        :param permutation: sequence holding each of 0 to n - 1 once
+        :return: rank between 0 and n! - 1
+        """
+        n = self._n
+        factorials = self._factorials
+        seen = 0
+        rank = 0
+        for i, value in enumerate(permutation):
+            value = int(value)
+            smaller = value - (seen & ((1 << value) - 1)).bit_count()
+            rank += smaller * factorials[n - 1 - i]
+            seen |= 1 << value
+        return rank
+
+    def rank_many(self, permutations: np.ndarray) -> np.ndarray:
+        """
+        Returns the Lehmer ranks of many permutations with array operations,
+        comparing every pair of positions once for all of them
+        :param permutations: (count, n) array, one permutation per row
+        :return: int64 array of ranks
+        """
+        n = self._n
+        permutations = np.asarray(permutations)
+        ranks = np.zeros(len(permutations), dtype=np.int64)
+        for i in range(n - 1):
+            # values after position i that are smaller than the value at i
+            smaller = (permutations[:, i + 1:] < permutations[:, i:i + 1]).sum(axis=1)
+            ranks += smaller * self._factorials[n - 1 - i]
+        return ranks
+
+    def unrank(self, rank: int) -> List[int]:
+        """
+        Returns the permutation with the given Lehmer rank
+        :param rank: rank between 0 and n! - 1
+        :return: list holding each of 0 to n - 1 once
+        """
+        n = self._n
+        remaining = list(range(n))
+        ret = []
+        for i in range(n - 1, -1, -1):
+            digit, rank = divmod(rank, self._factorials[i])
+            ret.append(remaining.pop(digit))
+        return ret
+
+    def unrank_digits(self, rank: int) -> Tuple[List[int], List[int]]:
+        """
+        Returns the permutation with the given Lehmer rank together with its
+        Lehmer digits, the number of smaller values after each position
+        :param rank: rank between 0 and n! - 1
+        :return: (permutation, digits), rank is the sum of digits[i] * (n - 1 - i)!
+        """
+        n = self._n
+        remaining = list(range(n))
+        permutation = []
+        digits = []
+        for i in range(n - 1, -1, -1):
+            digit, rank = divmod(rank, self._factorials[i])
+            digits.append(digit)
+            permutation.append(remaining.pop(digit))
+        return permutation, digits
@@ -1,5 +1,12 @@
+import collections
+import math
+import os
 import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from Problem import *
+from SearchControl import *
+from PackedPuzzle import blank_moves, pack_boards, packed_layers, layer_path
 
 
 def get_path(node: Node) -> List[str]:
@@ -16,87 +23,566 @@ def get_path(node: Node) -> List[str]:
     return p
 
 
-def breadth_first_search(problem: Problem) -> Any:
+def get_key_path(reached: dict, key: Any) -> List[str]:
+    """
+    Takes in a reached table that maps each state key to a tuple starting
+    with (parent key, action) and returns the list of actions from the root,
+    whose parent key is None, to the given key.
+    """
+    p = []
+    entry = reached[key]
+    while entry[0] is not None:
+        p.append(entry[1])
+        entry = reached[entry[0]]
+    p.reverse()
+    return p
+
+
+def _breadth_first_search_keys(problem: Problem, limits: SearchLimits = None) -> Any:
+    """
+    Breadth First Search over the successor interface. The reached table
+    maps each key to (parent key, action), so children are never built as
+    Node objects or full states. With a checkpoint in the limits the
+    frontier and reached table are snapshotted between expansions.
+    """
+    key = problem.state_key(problem.initial)
+    if problem.is_goal_key(key):
+        return solved(limits, [])
+
+    checkpoint = limits.checkpoint if limits is not None else None
+    resumed = checkpoint.resume("breadth_first_search", problem) if checkpoint is not None else None
+    if resumed is not None:
+        frontier = collections.deque(resumed["frontier"])
+        reached = resumed["reached"]
+        limits.nodes_expanded = resumed["nodes_expanded"]
+    else:
+        frontier = collections.deque([key])
+        reached = {key: (None, None)}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
+
+    while frontier:
+        if checkpoint is not None and checkpoint.due(limits.nodes_expanded):
+            checkpoint.save("breadth_first_search", problem, frontier=frontier, reached=reached,
+                            nodes_expanded=limits.nodes_expanded)
+        key = frontier.popleft()
+        if limits is not None and limits.expanded() is not None:
+            if checkpoint is not None:
+                # the node was not expanded, so it goes back to the front
+                frontier.appendleft(key)
+                checkpoint.save("breadth_first_search", problem, wait=True, frontier=frontier,
+                                reached=reached, nodes_expanded=limits.nodes_expanded)
+            return limits.result(limits.status, [], get_key_path(reached, key))
+
+        for action, child, cost in problem.successors(key):
+            if problem.is_goal_key(child):
+                reached[child] = (key, action)
+                return solved(limits, get_key_path(reached, child))
+
+            if child not in reached:
+                reached[child] = (key, action)
+                frontier.append(child)
+
+    return no_path(limits)  # no path found
+
+
+def _csr_path(parents: np.ndarray, key: int) -> List[int]:
+    """
+    Follows an array of parent vertices, -1 for the root, back from key.
+    Actions of a GraphProblem are the vertices moved to.
+    """
+    p = []
+    while parents[key] >= 0:
+        p.append(key)
+        key = int(parents[key])
+    p.reverse()
+    return p
+
+
+def _breadth_first_search_layers(problem: Problem, limits: SearchLimits = None) -> Any:
+    """
+    Breadth First Search for problems with neighbor slices. Each layer is an
+    array of keys expanded with one layer_neighbors call, the reached table
+    is an array of parents and duplicates are dropped with np.unique, keeping
+    the first parent like the node by node search. Paths and the number of
+    expanded nodes are the same as _breadth_first_search_keys.
+    """
+    key = problem.state_key(problem.initial)
+    if problem.is_goal_key(key):
+        return solved(limits, [])
+    goal = problem.state_key(problem.goal)
+
+    # -2 never reached, -1 the root, otherwise the parent vertex
+    parents = np.full(problem.vertices, -2, dtype=np.int64)
+    parents[key] = -1
+    layer = np.array([key], dtype=np.int64)
+    if limits is not None:
+        limits.track(reached=parents)
+
+    while len(layer):
+        children, index = problem.layer_neighbors(layer)
+        hits = np.flatnonzero(children == goal)
+        # nodes after the one that generates the goal are never expanded
+        expanding = len(layer) if len(hits) == 0 else int(index[hits[0]]) + 1
+        if limits is not None:
+            for i in range(expanding):
+                if limits.expanded() is not None:
+                    kept = index < i
+                    _record_children(parents, children[kept], layer[index[kept]])
+                    return limits.result(limits.status, [], _csr_path(parents, int(layer[i])))
+        if len(hits):
+            parents[goal] = layer[index[hits[0]]]
+            return solved(limits, _csr_path(parents, goal))
+        layer = _record_children(parents, children, layer[index])
+        if limits is not None:
+            limits.track(reached=parents, frontier=layer)
+
+    return no_path(limits)  # no path found
+
+
+def _record_children(parents: np.ndarray, children: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """
+    Sets the parent of every child seen for the first time and returns
+    those children in the order they were first generated
+    """
+    new = parents[children] == -2
+    children, sources = children[new], sources[new]
+    _, first = np.unique(children, return_index=True)
+    first.sort()
+    parents[children[first]] = sources[first]
+    return children[first]
+
+
+def breadth_first_search(problem: Problem, limits: SearchLimits = None) -> Any:
     """
     Takes in a Problem object that has an initial and goal state as
     well as search operators (methods). Performs a Breadth First Search
     and returns the path found using the get_path method. For example,
     return get_path(node), where node is the node with a state that
     matches the goal. Returns and empty list if no path is found.
+    If limits are given the search stops when one is reached and
+    a SearchResult is returned instead of a plain list.
     """
+    if limits is not None:
+        limits.start()
+    if problem.supports_neighbor_slices and (limits is None or limits.checkpoint is None):
+        return _breadth_first_search_layers(problem, limits)
+    if problem.supports_successors:
+        return _breadth_first_search_keys(problem, limits)
+    if limits is not None and limits.checkpoint is not None:
+        raise ValueError("Checkpoints need a problem with the successor interface")
     node = Node(problem.initial)
     if problem.is_goal(node.state):
-        return get_path(node)
+        return solved(limits, get_path(node))
 
     frontier = queue.Queue()  # Frontier is a queue that we use as a FIFO queue
     frontier.put(node)
     reached = {problem.hashable_state(node.state): node}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
 
     while not frontier.empty():
         node = frontier.get()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(node))
 
         for child in problem.expand(node):
             state = child.state
             if problem.is_goal(state):
                 # construct the path by traversing parent links
-                return get_path(child)
+                return solved(limits, get_path(child))
 
             state_key = problem.hashable_state(state)
             if state_key not in reached:
                 reached[state_key] = child
                 frontier.put(child)
 
-    return []  # no path found
+    return no_path(limits)  # no path found
+
+
+# smallest number of frontier nodes worth handing to another thread
+MIN_SHARD = 64
+
+
+class _ShardedReached:
+    """
+    Reached table split into dictionaries by key hash, so each shard can be
+    updated by its own thread. Supports the lookups used by get_key_path.
+    """
+
+    def __init__(self, shards: int):
+        self.shards = [{} for _ in range(shards)]
+
+    def shard(self, key: Any) -> dict:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.shard(key)[key]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.shard(key)
+
+
+def _expand_shard(problem: Problem, layer: List[Any], start: int, stop: int, reached: _ShardedReached,
+                  found: list, lock: threading.Lock) -> Any:
+    """
+    Expands layer[start:stop] without changing the reached table. Returns
+    the new children bucketed by reached shard as (parent index, action
+    index, child, parent, action) in generation order, and (parent index,
+    action, child) for the first goal generated or None. found[0] holds the
+    lowest parent index that generated a goal in any thread, parents after
+    it can be skipped.
+    """
+    shards = reached.shards
+    buckets = [[] for _ in shards]
+    seen = set()
+    for i in range(start, stop):
+        if found[0] < i:
+            break
+        key = layer[i]
+        for j, (action, child, cost) in enumerate(problem.successors(key)):
+            if problem.is_goal_key(child):
+                with lock:
+                    found[0] = min(found[0], i)
+                return buckets, (i, action, child)
+            if child in seen:
+                continue
+            r = hash(child) % len(shards)
+            if child not in shards[r]:
+                seen.add(child)
+                buckets[r].append((i, j, child, key, action))
+    return buckets, None
+
+
+def _claim_shard(table: dict, buckets: List[list]) -> List[tuple]:
+    """
+    Adds the children of one reached shard, taking the buckets in layer
+    order so the first parent to generate a child keeps it, like the
+    sequential search. Returns (parent index, action index, child) of
+    every child added.
+    """
+    added = []
+    for bucket in buckets:
+        for i, j, child, parent, action in bucket:
+            if child not in table:
+                table[child] = (parent, action)
+                added.append((i, j, child))
+    return added
+
+
+def parallel_breadth_first_search(problem: Problem, workers: int = None, limits: SearchLimits = None) -> Any:
+    """
+    Layer synchronous Breadth First Search over the successor interface.
+    Each frontier layer is split into contiguous shards that are expanded
+    by a thread pool, then every shard of the reached table is updated by
+    its own thread. Children are claimed in the order the sequential
+    search generates them, so the path is the same shortest path that
+    breadth_first_search returns. Threads only run in parallel on free
+    threaded Python builds or when successors releases the GIL. Falls back
+    to breadth_first_search for problems without the successor interface.
+    Returns and empty list if no path is found.
+    """
+    if not problem.supports_successors:
+        return breadth_first_search(problem, limits)
+    if limits is not None:
+        limits.start()
+    workers = workers or os.cpu_count() or 1
+    key = problem.state_key(problem.initial)
+    if problem.is_goal_key(key):
+        return solved(limits, [])
+
+    reached = _ShardedReached(workers)
+    reached.shard(key)[key] = (None, None)
+    if limits is not None:
+        limits.track(**{f"reached_{r}": table for r, table in enumerate(reached.shards)})
+    layer = [key]
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while layer:
+            found = [len(layer)]
+            shards = max(1, min(workers, len(layer) // MIN_SHARD))
+            bounds = [len(layer) * s // shards for s in range(shards + 1)]
+            if shards == 1:
+                expanded = [_expand_shard(problem, layer, 0, len(layer), reached, found, lock)]
+            else:
+                expanded = list(pool.map(lambda s: _expand_shard(problem, layer, bounds[s], bounds[s + 1],
+                                                                 reached, found, lock), range(shards)))
+            goals = [goal for _, goal in expanded if goal is not None]
+            goal = min(goals, key=lambda g: g[0]) if goals else None
+
+            # count the nodes the sequential search would have expanded
+            if limits is not None:
+                for i in range(len(layer) if goal is None else goal[0] + 1):
+                    if limits.expanded() is not None:
+                        return limits.result(limits.status, [], get_key_path(reached, layer[i]))
+            if goal is not None:
+                i, action, child = goal
+                return solved(limits, get_key_path(reached, layer[i]) + [action])
 
+            by_shard = [[buckets[r] for buckets, _ in expanded] for r in range(len(reached.shards))]
+            if len(layer) >= MIN_SHARD * 2:
+                added = list(pool.map(_claim_shard, reached.shards, by_shard))
+            else:
+                added = [_claim_shard(table, buckets) for table, buckets in zip(reached.shards, by_shard)]
+            layer = [child for _, _, child in sorted(item for items in added for item in items)]
 
+    return no_path(limits)  # no path found
 
-def depth_first_search(problem: Problem) -> Any:
+
+def _ranked_path(problem: SlidingPuzzle, reached: bytearray, rank: int) -> List[str]:
+    """
+    Walks back from the state with the given rank by undoing the action
+    stored for each state until the initial state is reached.
+    """
+    p = []
+    state = problem.unrank(rank)
+    while reached[rank] != len(problem.ACTIONS) + 1:
+        action = problem.ACTIONS[reached[rank] - 1]
+        p.append(action)
+        state = problem._result(state, problem.reverse_action(action))
+        rank = problem.rank(state)
+    p.reverse()
+    return p
+
+
+def _ranked_moves(size: int, factorials: List[int]) -> List[List[Tuple[int, int, int, int, List[Tuple[int, int]]]]]:
+    """
+    The blank_moves table with what the ranked search needs for each move:
+    (action code + 1, position of the swapped tile, its rank weight, the rank
+    weight of the blank's position, (position, rank weight) of the positions
+    between the two). The weight of position i is (n - 1 - i)!.
+    """
+    n = size * size
+    weights = [factorials[n - 1 - i] for i in range(n)]
+    table = []
+    for blank, moves in enumerate(blank_moves(size)):
+        table.append([(code + 1, tile, weights[tile], weights[blank],
+                       [(i, weights[i]) for i in range(min(blank, tile) + 1, max(blank, tile))])
+                      for code, tile in moves])
+    return table
+
+
+def ranked_breadth_first_search(problem: SlidingPuzzle, limits: SearchLimits = None) -> Any:
+    """
+    Breadth First Search for problems that rank their states, like the
+    SlidingPuzzle up to 3x3. The reached table is a preallocated bytearray
+    with one byte per rank holding the action that reached the state (0 for
+    not reached), so no Node objects or hashing are needed. The frontier
+    holds each rank with its board and Lehmer digits as lists. A move swaps
+    the blank (0) with one tile, so only the digits of the two positions and
+    of the ones between them change and a child's rank is the parent's plus
+    a few integer terms, no array is built and nothing is unranked. The path
+    is rebuilt by undoing the stored actions. Returns and empty list if no
+    path is found.
+    """
+    if problem.initial.size > 9:
+        raise ValueError(f"The reached table of a {problem.initial.shape[0]}x{problem.initial.shape[1]} puzzle "
+                         f"needs {problem.indexer.size:.2e} bytes, ranked search supports boards up to 3x3")
+    if limits is not None:
+        limits.start()
+    start = problem.rank(problem.initial)
+    goal = problem.rank(problem.goal)
+    if start == goal:
+        return solved(limits, [])
+
+    indexer = problem.indexer
+    moves = _ranked_moves(problem.initial.shape[0], [math.factorial(i) for i in range(indexer.n + 1)])
+    reached = bytearray(indexer.size)
+    reached[start] = len(problem.ACTIONS) + 1  # marks the initial state
+
+    # the frontier holds (rank, board, Lehmer digits) so a popped rank is never unranked
+    board, digits = indexer.unrank_digits(start)
+    frontier = collections.deque([(start, board, digits)])
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
+    while frontier:
+        rank, board, digits = frontier.popleft()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], _ranked_path(problem, reached, rank))
+
+        blank = board.index(0)
+        for code, tile, tile_weight, blank_weight, between in moves[blank]:
+            value = board[tile]
+            digit = digits[tile]
+            # values the tile jumps over that are smaller than it, none for east and west
+            smaller = 0
+            passed = 0
+            for i, weight in between:
+                if board[i] < value:
+                    smaller += 1
+                    passed += weight
+            # the blank's digit is 0 before and after the move, the tile's new digit gains
+            # the blank and the smaller values it passes when it moves forward and loses them otherwise
+            if tile > blank:
+                moved, step = 1 + digit + smaller, 1
+            else:
+                moved, step = digit - smaller - 1, -1
+            child_rank = rank + moved * blank_weight - digit * tile_weight + step * passed
+            if reached[child_rank]:
+                continue
+            reached[child_rank] = code
+            if child_rank == goal:
+                return solved(limits, _ranked_path(problem, reached, child_rank))
+            child_board = board[:]
+            child_board[blank], child_board[tile] = value, 0
+            child_digits = digits[:]
+            child_digits[blank], child_digits[tile] = moved, 0
+            if smaller:
+                for i, _ in between:
+                    if board[i] < value:
+                        child_digits[i] += step
+            frontier.append((child_rank, child_board, child_digits))
+
+    return no_path(limits)  # no path found
+
+
+def packed_breadth_first_search(problem: SlidingPuzzle, max_boards: int = 30000000,
+                                limits: SearchLimits = None) -> Any:
+    """
+    Bidirectional Breadth First Search for sliding puzzles up to 4x4 that
+    expands a whole layer at a time. Boards are packed into uint64 values,
+    the children of a layer are made with bit operations and deduplicated
+    by sorting (see PackedPuzzle), so no per-node Python work is done. The
+    side with the smaller last layer grows until the two last layers share
+    a board, so each side only goes about half the solution depth. Layers
+    are kept to rebuild the path and nodes are counted a layer at a time.
+    Returns and empty list if no path is found.
+    :param max_boards: boards the layers may hold before the search gives up with
+    the node_budget status, about 80 bytes of memory each while a layer is expanded
+    """
+    if limits is not None:
+        limits.start()
+    size = problem.initial.shape[0]
+    start = pack_boards(problem.initial.reshape(1, -1))
+    goal = pack_boards(problem.goal.reshape(1, -1))
+    if start[0] == goal[0]:
+        return solved(limits, [])
+
+    sweeps = [packed_layers(start, size), packed_layers(goal, size)]
+    layers = [[next(sweeps[0])[1]], [next(sweeps[1])[1]]]
+    if limits is not None:
+        limits.track(forward_reached=layers[0], backward_reached=layers[1])
+    while True:
+        side = 0 if len(layers[0][-1]) <= len(layers[1][-1]) else 1
+        # the next layer holds about twice as many boards as the one expanded
+        too_large = sum(len(layer) for layer in layers[0] + layers[1]) + 2 * len(layers[side][-1]) > max_boards
+        if too_large and limits is None:
+            return []
+        if limits is not None and (too_large or limits.expanded_many(len(layers[side][-1])) is not None):
+            best = layer_path(layers[0], layers[0][-1][0], size)
+            return limits.result(NODE_BUDGET if too_large else limits.status, [],
+                                 [problem.ACTIONS[code] for code in best])
+        grown = next(sweeps[side], None)
+        if grown is None:
+            return no_path(limits)  # one side ran out of boards, no path found
+        layers[side].append(grown[1])
+
+        meet = np.flatnonzero(np.isin(layers[0][-1], layers[1][-1], assume_unique=True))
+        if len(meet):
+            middle = layers[0][-1][meet[0]]
+            forward = layer_path(layers[0], middle, size)
+            # the backward moves lead from the goal to the middle, undo them in reverse
+            backward = [(code + 2) % 4 for code in reversed(layer_path(layers[1], middle, size))]
+            return solved(limits, [problem.ACTIONS[code] for code in forward + backward])
+
+
+def _depth_first_search_keys(problem: Problem, limits: SearchLimits = None) -> Any:
+    """
+    Depth First Search over the successor interface, see _breadth_first_search_keys
+    """
+    key = problem.state_key(problem.initial)
+    if problem.is_goal_key(key):
+        return solved(limits, [])
+
+    frontier = [key]
+    reached = {key: (None, None)}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
+
+    while frontier:
+        key = frontier.pop()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_key_path(reached, key))
+
+        for action, child, cost in problem.successors(key):
+            if problem.is_goal_key(child):
+                reached[child] = (key, action)
+                return solved(limits, get_key_path(reached, child))
+
+            if child not in reached:
+                reached[child] = (key, action)
+                frontier.append(child)
+
+    return no_path(limits)  # no path found
+
+
+def depth_first_search(problem: Problem, limits: SearchLimits = None) -> Any:
     """
     Takes in a Problem object that has an initial and goal state as
      well as search operators (methods). Performs a Depth First Search
      and returns the path found using the get_path method. For example,
      return get_path(node), where node is the node with a state that
       matches the goal. Returns and empty list if no path is found.
+      If limits are given a SearchResult is returned instead.
      """
+    if limits is not None:
+        limits.start()
+    if problem.supports_successors:
+        return _depth_first_search_keys(problem, limits)
     initial_node = Node(problem.initial)
     if problem.is_goal(initial_node.state):
-        return get_path(initial_node)
+        return solved(limits, get_path(initial_node))
 
     frontier = [initial_node]
     reached = {problem.hashable_state(initial_node.state): initial_node}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
 
     while frontier:
         node = frontier.pop()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(node))
 
         for child in problem.expand(node):
             state = child.state
             if problem.is_goal(state):
                 # construct the path by traversing parent links
-                return get_path(child)
+                return solved(limits, get_path(child))
 
             state_key = problem.hashable_state(state)
             if state_key not in reached:
                 reached[state_key] = child
                 frontier.append(child)
 
-    return []  # no path found
+    return no_path(limits)  # no path found
 
-def bidirectional_search(problem: Problem) -> Any:
+def bidirectional_search(problem: Problem, limits: SearchLimits = None) -> Any:
+    if isinstance(problem, GraphProblem):
+        # the backward half follows edges the wrong way and its actions cannot be inverted
+        raise ValueError("Bidirectional search needs reversible moves, a GraphProblem has directed edges")
+    if limits is not None:
+        limits.start()
     initial_node = Node(problem.initial)
     goal_node = Node(problem.goal)
 
     if problem.is_goal(initial_node.state):
-        return get_path(initial_node)
+        return solved(limits, get_path(initial_node))
 
     # Initialize the frontiers and reached sets for the forward and backward searches
     forward_frontier = [initial_node]
     backward_frontier = [goal_node]
     forward_reached = {problem.hashable_state(initial_node.state): initial_node}
     backward_reached = {problem.hashable_state(goal_node.state): goal_node}
+    if limits is not None:
+        limits.track(forward_reached=forward_reached, backward_reached=backward_reached,
+                     forward_frontier=forward_frontier, backward_frontier=backward_frontier)
 
     while forward_frontier and backward_frontier:
         # Perform forward search expansion
         forward_node = forward_frontier.pop()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(forward_node))
         for forward_child in problem.expand(forward_node):
             forward_state = forward_child.state
             forward_state_key = problem.hashable_state(forward_state)
@@ -105,7 +591,7 @@ def bidirectional_search(problem: Problem) -> Any:
                 backward_node = backward_reached[forward_state_key]
                 forward_path = get_path(forward_child)
                 backward_path = get_path(backward_node)[::-1]  # Reverse the backward path
-                return forward_path + backward_path
+                return solved(limits, forward_path + backward_path)
 
             if forward_state_key not in forward_reached:
                 forward_reached[forward_state_key] = forward_child
@@ -113,6 +599,8 @@ def bidirectional_search(problem: Problem) -> Any:
 
         # Perform backward search expansion
         backward_node = backward_frontier.pop()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, [], get_path(forward_node))
         for backward_child in problem.expand(backward_node):
             backward_state = backward_child.state
             backward_state_key = problem.hashable_state(backward_state)
@@ -121,12 +609,189 @@ def bidirectional_search(problem: Problem) -> Any:
                 forward_node = forward_reached[backward_state_key]
                 forward_path = get_path(forward_node)
                 backward_path = get_path(backward_child)[::-1]  # Reverse the backward path
-                return forward_path + backward_path
+                return solved(limits, forward_path + backward_path)
 
             if backward_state_key not in backward_reached:
                 backward_reached[backward_state_key] = backward_child
                 backward_frontier.append(backward_child)
 
-    return []  # no path found
+    return no_path(limits)  # no path found
+
+
+def _frontier_expand(problem: Problem, layer: dict, limits: SearchLimits = None) -> dict:
+    """
+    Expands every state in a frontier layer and returns the next layer.
+    A layer maps a state key to [state, used] where used holds the keys
+    of the neighbors that already generated that state (the used operators).
+    Those neighbors are never generated again, so no closed list is needed
+    as long as the actions of the problem are reversible.
+    """
+    next_layer = {}
+    for key, (state, used) in layer.items():
+        if limits is not None:
+            limits.check()
+        for child in problem.expand(Node(state)):
+            child_key = problem.hashable_state(child.state)
+            if child_key in used:
+                continue
+            if child_key in layer:
+                # neighbor on the same layer, it must not generate us later
+                layer[child_key][1].add(key)
+                continue
+            entry = next_layer.get(child_key)
+            if entry is None:
+                next_layer[child_key] = [child.state, {key}]
+            else:
+                entry[1].add(key)
+    return next_layer
+
+
+def _frontier_midpoint(problem: Problem, start: Any, goal: Any, limits: SearchLimits = None) -> Any:
+    """
+    Runs a bidirectional frontier search between start and goal, alternating
+    one full layer at a time so both sides stay the same depth. Returns
+    (midpoint state, forward depth, backward depth) or None if the two
+    states are not connected.
+    """
+    forward = {problem.hashable_state(start): [start, set()]}
+    backward = {problem.hashable_state(goal): [goal, set()]}
+    forward_depth = backward_depth = 0
+
+    for key in forward:
+        if key in backward:
+            return start, 0, 0
+
+    while forward and backward:
+        if forward_depth <= backward_depth:
+            forward = _frontier_expand(problem, forward, limits)
+            forward_depth += 1
+        else:
+            backward = _frontier_expand(problem, backward, limits)
+            backward_depth += 1
+        if limits is not None:
+            limits.track(forward_layer=forward, backward_layer=backward)
+
+        smaller, larger = (forward, backward) if len(forward) <= len(backward) else (backward, forward)
+        for key in smaller:
+            if key in larger:
+                return smaller[key][0], forward_depth, backward_depth
+
+    return None
+
+
+def _frontier_solve(problem: Problem, start: Any, goal: Any, limits: SearchLimits = None) -> Any:
+    """
+    Divide and conquer path reconstruction. Finds a state in the middle of
+    a shortest path and recursively solves both halves. Returns a list of
+    actions or None if goal cannot be reached from start.
+    """
+    meet = _frontier_midpoint(problem, start, goal, limits)
+    if meet is None:
+        return None
+    middle, forward_depth, backward_depth = meet
+
+    if forward_depth + backward_depth == 0:
+        return []
+    if forward_depth + backward_depth == 1:
+        # adjacent states, find the action that connects them
+        goal_key = problem.hashable_state(goal)
+        for child in problem.expand(Node(start)):
+            if problem.hashable_state(child.state) == goal_key:
+                return [child.action]
+        return None
+
+    first_half = _frontier_solve(problem, start, middle, limits)
+    second_half = _frontier_solve(problem, middle, goal, limits)
+    if first_half is None or second_half is None:
+        return None
+    return first_half + second_half
+
+
+def frontier_search(problem: Problem, limits: SearchLimits = None) -> Any:
+    """
+    Takes in a Problem object that has an initial and goal state as
+    well as search operators (methods). Performs a breadth first frontier
+    search that only keeps the open layers in memory instead of a Node for
+    every reached state. The path is recovered by finding the midpoint of
+    the solution and solving both halves recursively, so memory is bounded
+    by the frontier width at the cost of re-searching. Assumes actions are
+    reversible and all steps cost the same, as in the mazes and sliding puzzle.
+    Returns an empty list if no path is found. Nothing is known about the
+    path until it is complete, so a limited search has no best_so_far.
+    """
+    if isinstance(problem, GraphProblem):
+        raise ValueError("Frontier search needs reversible moves, a GraphProblem has directed edges")
+    if limits is not None:
+        limits.start()
+    try:
+        path = _frontier_solve(problem, problem.initial, problem.goal, limits)
+    except SearchInterrupted as e:
+        return limits.result(e.status, [])
+    if path is None:
+        return no_path(limits)  # no path found
+    return solved(limits, path)
+
+
+def multi_goal_search(problem: Problem, goals: List[Any], limits: SearchLimits = None) -> Any:
+    """
+    Takes in a Problem object and a list of goal states and performs a
+    single Breadth First Search from the initial state that records the
+    path to every goal as it is reached, instead of searching once per
+    goal. The problem's own goal is ignored. The search stops once every
+    goal is found or the frontier runs out, which proves the remaining
+    goals unreachable. For mazes, goal states can be built from cell
+    indexes with key_state. Returns a list with the path to each goal in
+    the same order as goals, an empty list for a goal equal to the initial
+    state and None for a goal that was not reached. If limits are given a
+    SearchResult of the paths found so far is returned, solved only if
+    every goal was reached and no_path if the others are unreachable.
+    """
+    if limits is not None:
+        limits.start()
+    fast = problem.supports_successors
+    key_of = problem.state_key if fast else problem.hashable_state
+
+    # indexes of the goals each key stands for, several goals may be equal
+    remaining = {}
+    for i, goal in enumerate(goals):
+        remaining.setdefault(key_of(goal), []).append(i)
+    paths = [None] * len(goals)
+
+    key = key_of(problem.initial)
+    for i in remaining.pop(key, []):
+        paths[i] = []
+    if fast:
+        frontier = collections.deque([key])
+        reached = {key: (None, None)}
+    else:
+        frontier = collections.deque([Node(problem.initial)])
+        reached = {key}
+    if limits is not None:
+        limits.track(reached=reached, frontier=frontier)
+
+    while frontier and remaining:
+        node = frontier.popleft()
+        if limits is not None and limits.expanded() is not None:
+            return limits.result(limits.status, paths)
 
+        if fast:
+            for action, child, cost in problem.successors(node):
+                if child not in reached:
+                    reached[child] = (node, action)
+                    frontier.append(child)
+                    if child in remaining:
+                        for i in remaining.pop(child):
+                            paths[i] = get_key_path(reached, child)
+        else:
+            for child in problem.expand(node):
+                child_key = problem.hashable_state(child.state)
+                if child_key not in reached:
+                    reached.add(child_key)
+                    frontier.append(child)
+                    if child_key in remaining:
+                        for i in remaining.pop(child_key):
+                            paths[i] = get_path(child)
 
+    if limits is None:
+        return paths
+    return limits.result(NO_PATH if remaining else SOLVED, paths)
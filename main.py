@@ -1,50 +1,27 @@
-import csv
+import os
 import tracemalloc
 import time
 
 from InformedSearch import *
 from UninformedSearch import *
 from mazes import *
+from PuzzleTable import SolutionTable
+from HeuristicCache import HeuristicCache
+from HierarchicalSearch import hpa_star
+from Landmarks import enable_landmarks
+from ResultsStore import ALGORITHMS, RESULTS_FILE, ResultsStore
+from MemoryReport import MemoryMonitor
+from MazeRender import SearchRecorder, maze_image, save_image
+from PuzzleCorpus import corpus_filename, load_corpus, select
+from SearchCheckpoint import SearchCheckpoint
+from GraphLoader import load_graph
 
 
 
 
-def run_test(maze_type:int, search_type: str, print_stats: bool = True, print_maze: bool = False):
-    if maze_type == 1:
-        initial_state, goal_state = basic_maze()
-    elif maze_type == 2:
-        initial_state, goal_state = goaless_maze()
-    elif maze_type == 3:
-        # start in the center and goal is north at end of spoke
-        initial_state, goal_state = cross_maze(101, [50, 50], [0, 50])
-    elif maze_type == 4:
-        # start in the center and goal is west at end of spoke
-        initial_state, goal_state = cross_maze(101, [50, 50], [50, 0])
-    elif maze_type == 5:
-        # start in the center and goal is north midway down the spoke
-        initial_state, goal_state = cross_maze(101, [50, 50], [25, 50])
-    elif maze_type == 6:
-        # start in the center and goal is west midway down the spoke
-        initial_state, goal_state = cross_maze(101, [50, 50], [50, 25])
-        # initial_state, goal_state = test_maze6()
-    elif maze_type == 7:
-        # start left center and goal is top center
-        initial_state, goal_state = border_maze(101, [50, 0], [0, 50])
-    elif maze_type == 8:
-        # start left center and goal is bottom center
-        initial_state, goal_state = border_maze(101, [50, 0], [100, 50])
-    elif maze_type == 9:
-        # start left center and goal is upper left
-        initial_state, goal_state = border_maze(101, [50, 0], [0, 0])
-    elif maze_type == 10:
-        # start left center and goal is lower left
-        initial_state, goal_state = border_maze(101, [50, 0], [100, 0])
-    elif maze_type == 11:
-        # Informed search test maze
-        initial_state, goal_state = informed_maze()
-    else:
-        initial_state = np.array([])
-        goal_state = np.array([])
+def run_test(maze_type:int, search_type: str, print_stats: bool = True, print_maze: bool = False,
+             cache_heuristic: bool = False, use_landmarks: bool = False, image_dir: str = None):
+    initial_state, goal_state = numbered_maze(maze_type)
 
     if print_maze:
         # draw_maze(initial_state, goal_state, None)
@@ -54,6 +31,13 @@ def run_test(maze_type:int, search_type: str, print_stats: bool = True, print_ma
         print(goal_state)
 
     p1 = MazeNavigation(initial_state, goal_state)
+    if use_landmarks:
+        enable_landmarks(p1)
+    cache = HeuristicCache(p1) if cache_heuristic else None
+    recorder = SearchRecorder(p1) if image_dir is not None else None
+    memory = MemoryMonitor()
+    if cache is not None:
+        memory.track("heuristic_cache", cache, persistent=True)
 
     # memory, time, path length
     stats = [0 for i in range(3)]
@@ -63,16 +47,29 @@ def run_test(maze_type:int, search_type: str, print_stats: bool = True, print_ma
     start = time.time()
     tracemalloc.start()
 
+    limits = SearchLimits(memory=memory)
     if search_type == "b":
-        path = breadth_first_search(p1)
+        path = breadth_first_search(p1, limits=limits)
     elif search_type == "d":
-        path = depth_first_search(p1)
+        path = depth_first_search(p1, limits=limits)
     elif search_type == "a":
-        path = a_star(p1)
+        path = a_star(p1, limits=limits)
     elif search_type == "g":
-        path = greedy(p1)
+        path = greedy(p1, limits=limits)
     elif search_type == "s":
-        path = bidirectional_search(p1)
+        path = bidirectional_search(p1, limits=limits)
+    elif search_type == "f":
+        path = frontier_search(p1, limits=limits)
+    elif search_type == "n":
+        path = ara_star(p1, limits=limits)
+    elif search_type == "w":
+        path = beam_search(p1, limits=limits)
+    elif search_type == "m":
+        path = sma_star(p1, limits=limits)
+    elif search_type == "h":
+        path = hpa_star(p1, limits=limits)
+    elif search_type == "p":
+        path = parallel_breadth_first_search(p1, limits=limits)
 
     memory_usage = tracemalloc.get_traced_memory()
     stats[0] = memory_usage[1]
@@ -87,19 +84,38 @@ def run_test(maze_type:int, search_type: str, print_stats: bool = True, print_ma
         print(f"Elasped time {stats[1]:.4f}")
         print(f"Path length: {stats[2]}")
         print(f"Path: {path}")
+        if cache is not None:
+            print(cache)
+        print(memory)
+
+    if recorder is not None:
+        filename = os.path.join(image_dir, f"maze{maze_type}_{search_type}.png")
+        save_image(maze_image(initial_state, goal_state, recorder.expanded, recorder.frontier, path, scale=4),
+                   filename)
+        print(f"Saved {filename}")
 
     return stats, path
 
 
-def run_puzzle(algorithm):
+def run_puzzle(algorithm, cache_heuristic: bool = False, size: int = 3, heuristic: str = "manhattan",
+               band: str = None, checkpoint_file: str = None):
     print_stats = True
     print_maze = True
-    SIZE = 3
+    SIZE = size
     random = False
+    # random boards can be unsolvable, so searches give up after this many seconds
+    TIME_LIMIT = 60
     goal_state = np.arange(1, SIZE * SIZE + 1).reshape((SIZE, SIZE))
     goal_state[SIZE-1][SIZE-1] = 0
 
-    if random:
+    if band is not None:
+        # a corpus instance of the band, whose optimal solution length is known
+        corpus = load_corpus(corpus_filename(SIZE))
+        instances = select(corpus, band)
+        instance = instances[np.random.randint(len(instances))]
+        initial_state = np.array(instance["board"]).reshape(goal_state.shape)
+        print(f"Corpus instance {instance['id']}, optimal solution length {instance['optimal']}")
+    elif random:
         flattened = goal_state.flatten()
         np.random.shuffle(flattened)
         initial_state = flattened.reshape(goal_state.shape)
@@ -116,7 +132,10 @@ def run_puzzle(algorithm):
         print(initial_state)
         print(f"Goal state: ")
         print(goal_state)
-    problem = SlidingPuzzle(initial_state, goal_state)
+    problem = SlidingPuzzle(initial_state, goal_state, heuristic)
+    cache = HeuristicCache(problem) if cache_heuristic else None
+    # the table is built on first use and memory mapped afterwards
+    table = SolutionTable(goal_state) if algorithm == "t" else None
 
     stats = [0 for i in range(3)]
     path = []
@@ -125,16 +144,41 @@ def run_puzzle(algorithm):
     start = time.time()
     tracemalloc.start()
 
+    memory = MemoryMonitor()
+    if cache is not None:
+        memory.track("heuristic_cache", cache, persistent=True)
+    # breadth first, A* and greedy resume from the snapshot left by a run that hit the time limit
+    checkpoint = None
+    if checkpoint_file is not None and algorithm in ("b", "a", "g"):
+        checkpoint = SearchCheckpoint(checkpoint_file)
+    limits = SearchLimits(time_limit=TIME_LIMIT, memory=memory, checkpoint=checkpoint)
     if algorithm == "b":
-        path = breadth_first_search(problem)
+        path = breadth_first_search(problem, limits=limits)
     elif algorithm == "d":
-        path = depth_first_search(problem)
+        path = depth_first_search(problem, limits=limits)
     elif algorithm == "a":
-        path = a_star(problem)
+        path = a_star(problem, limits=limits)
     elif algorithm == "g":
-        path = greedy(problem)
+        path = greedy(problem, limits=limits)
     elif algorithm == "s":
-        path = bidirectional_search(problem)
+        path = bidirectional_search(problem, limits=limits)
+    elif algorithm == "f":
+        path = frontier_search(problem, limits=limits)
+    elif algorithm == "n":
+        path = ara_star(problem, callback=lambda p, bound: print(f"Found path of length {len(p)} (bound {bound:.2f})"),
+                        limits=limits)
+    elif algorithm == "r":
+        path = ranked_breadth_first_search(problem, limits=limits)
+    elif algorithm == "v":
+        path = packed_breadth_first_search(problem, limits=limits)
+    elif algorithm == "p":
+        path = parallel_breadth_first_search(problem, limits=limits)
+    elif algorithm == "w":
+        path = beam_search(problem, limits=limits)
+    elif algorithm == "m":
+        path = sma_star(problem, limits=limits)
+    elif algorithm == "t":
+        path = table.solve(initial_state)
 
     memory_usage = tracemalloc.get_traced_memory()
     stats[0] = memory_usage[1]
@@ -144,33 +188,122 @@ def run_puzzle(algorithm):
     stats[2] = len(path)
 
     if print_stats:
+        if isinstance(path, SearchResult):
+            print(f"Status: {path.status} after {path.nodes_expanded} nodes")
         print(f"Memory usage: {stats[0]:.2e}")
         print(f"Elasped time {stats[1]:.4f}")
         print(f"Path length: {stats[2]}")
         print(f"Path: {path}")
+        if cache is not None:
+            print(cache)
+        print(memory)
 
     return stats, path
 
 
+# searches that assume every move can be undone, which the directed edges of a graph do not allow
+GRAPH_UNSUPPORTED = {"s": "Bidirectional Search", "f": "Frontier Search"}
+
+
+def run_graph(algorithm, filename: str, initial: int = 0, goal: int = None, coordinates: str = None):
+    if algorithm in GRAPH_UNSUPPORTED:
+        raise ValueError(f"{GRAPH_UNSUPPORTED[algorithm]} needs reversible moves and cannot search a graph")
+    print_stats = True
+    # graphs with millions of edges take a while, searches give up after this many seconds
+    TIME_LIMIT = 300
+
+    load_start = time.time()
+    problem = load_graph(filename, initial, goal, coordinates=coordinates)
+    print(f"Loaded {problem.vertices} vertices and {problem.edges} edges in {time.time() - load_start:.2f}s, "
+          f"searching from {problem.initial} to {problem.goal}")
+
+    stats = [0 for i in range(3)]
+    path = []
+
+    start = time.time()
+    tracemalloc.start()
+
+    memory = MemoryMonitor()
+    limits = SearchLimits(time_limit=TIME_LIMIT, memory=memory)
+    if algorithm == "b":
+        path = breadth_first_search(problem, limits=limits)
+    elif algorithm == "d":
+        path = depth_first_search(problem, limits=limits)
+    elif algorithm == "a":
+        path = a_star(problem, limits=limits)
+    elif algorithm == "g":
+        path = greedy(problem, limits=limits)
+    elif algorithm == "n":
+        path = ara_star(problem, limits=limits)
+    elif algorithm == "p":
+        path = parallel_breadth_first_search(problem, limits=limits)
+    elif algorithm == "w":
+        path = beam_search(problem, limits=limits)
+    elif algorithm == "m":
+        path = sma_star(problem, limits=limits)
+
+    memory_usage = tracemalloc.get_traced_memory()
+    stats[0] = memory_usage[1]
+    tracemalloc.stop()
+    end = time.time()
+    stats[1] = (end - start)
+    stats[2] = len(path)
+
+    if print_stats:
+        if isinstance(path, SearchResult):
+            print(f"Status: {path.status} after {path.nodes_expanded} nodes")
+        print(f"Memory usage: {stats[0]:.2e}")
+        print(f"Elasped time {stats[1]:.4f}")
+        print(f"Path length: {stats[2]}")
+        print(f"Path: {path}")
+        print(memory)
+
+    return stats, path
 
 
 if __name__ == '__main__':
     print_maze = False
     print_stats = True
-    filename = "searchResultsExample.csv"
+    # memoize estimated_cost for the informed searches
+    cache_heuristic = False
+    # use landmark distances instead of manhattan distance in mazes
+    use_landmarks = False
+    # width of the sliding puzzle and its heuristic: manhattan, linear_conflict or walking_distance
+    puzzle_size = 3
+    puzzle_heuristic = "manhattan"
+    # difficulty band (easy, medium or hard) of puzzle_corpus_NxN.json to draw the board from, None for the hardest board
+    puzzle_band = None
+    # file the puzzle search is snapshotted to and resumed from, None to disable checkpoints
+    puzzle_checkpoint = None
+    # edge list or DIMACS .gr file searched when choosing g, None to be asked, and an optional DIMACS .co
+    # coordinate file that gives A* and greedy a straight line heuristic
+    graph_file = None
+    graph_coordinates = None
+    # directory to save a picture of each maze search to, None to skip
+    image_dir = None
+    # runs are appended to this file, summarize it with python ResultsStore.py summarize
+    filename = RESULTS_FILE
 
     algorithm = input(f"Which algorithm do you want to run: "
                       f"\n(b)Breadth First Search "
                       f"\n(d)Depth First Search "
                       f"\n(a)A* Search "
                       f"\n(g)Greedy Search "
-                      f"\n(s)Bidirectional Search"
+                      f"\n(s)Bidirectional Search (not for graphs)"
+                      f"\n(f)Frontier Search (not for graphs)"
+                      f"\n(n)Anytime A* Search (ARA*)"
+                      f"\n(w)Beam Search"
+                      f"\n(m)Memory-bounded A* Search (SMA*)"
+                      f"\n(h)Hierarchical Search (HPA*, mazes only)"
+                      f"\n(p)Parallel Breadth First Search"
+                      f"\n(r)Ranked Breadth First Search (sliding puzzle up to 3x3 only)"
+                      f"\n(v)Vectorized Bidirectional Breadth First Search (sliding puzzle up to 4x4 only)"
+                      f"\n(t)Solution Table (3x3 sliding puzzle only)"
                       f"\n(c)All\n")
-    num_mazes = 11
-    problem_type = input(f"Enter m for maze or s for sliding puzzle.")
+    num_mazes = NUM_MAZES
+    problem_type = input(f"Enter m for maze, s for sliding puzzle or g for graph.")
 
-    stats = []
-    rows = []
+    runs = []
     mazes = []
 
     if problem_type == 'm':
@@ -183,41 +316,86 @@ if __name__ == '__main__':
             print("Invalid maze number")
 
     if problem_type == "s":
-        run_puzzle(algorithm)
+        s, p = run_puzzle(algorithm, cache_heuristic, puzzle_size, puzzle_heuristic, puzzle_band,
+                          puzzle_checkpoint)
+        ResultsStore(filename).append_run(f"Puzzle_{algorithm}", algorithm, "puzzle",
+                                          {"size": puzzle_size, "heuristic": puzzle_heuristic, "band": puzzle_band,
+                                           "cache_heuristic": cache_heuristic}, s, p)
+
+    if problem_type == "g" and algorithm in GRAPH_UNSUPPORTED:
+        print(f"{GRAPH_UNSUPPORTED[algorithm]} needs reversible moves and cannot search a graph")
+    elif problem_type == "g":
+        if graph_file is None:
+            graph_file = input("Enter the graph file, an edge list or a DIMACS .gr file: ")
+        endpoints = input("Enter the start and goal vertices, or nothing for the first and last vertex: ").split()
+        graph_start, graph_goal = (int(endpoints[0]), int(endpoints[1])) if len(endpoints) == 2 else (0, None)
+        s, p = run_graph(algorithm, graph_file, graph_start, graph_goal, graph_coordinates)
+        ResultsStore(filename).append_run(f"Graph_{algorithm}", algorithm, "graph",
+                                          {"file": os.path.basename(graph_file), "start": graph_start,
+                                           "goal": graph_goal}, s, p)
 
     for m in mazes:
         print(f"\nMaze num: {m}")
         if algorithm == "c" or algorithm == "d":
             if print_stats:
                 print(f"DFS_{m}")
-                s, p = run_test(m, "d", print_stats, print_maze)
-            stats.append([f"DFS_{m}"] + s + p)
+                s, p = run_test(m, "d", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"DFS_{m}", s, p))
         if algorithm == "c" or algorithm == "b":
             if print_stats:
                 print(f"BFS_{m}")
-                s, p = run_test(m, "b", print_stats, print_maze)
-            stats.append([f"BFS_{m}"] + s + p)
+                s, p = run_test(m, "b", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"BFS_{m}", s, p))
         if algorithm == "c" or algorithm == "a":
             if print_stats:
                 print(f"A*_{m}")
-                s, p = run_test(m, "a", print_stats, print_maze)
-            stats.append([f"A*_{m}"] + s + p)
+                s, p = run_test(m, "a", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"A*_{m}", s, p))
         if algorithm == "c" or algorithm == "g":
             if print_stats:
                 print(f"Greedy_{m}")
-                s, p = run_test(m, "g", print_stats, print_maze)
-            stats.append([f"Greedy_{m}"] + s + p)
+                s, p = run_test(m, "g", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"Greedy_{m}", s, p))
         if algorithm == "c" or algorithm == "s":
             if print_stats:
                 print(f"Bidirectional_{m}")
-                s, p = run_test(m, "s", print_stats, print_maze)
-            stats.append([f"Bidirectional_{m}"] + s + p)
-
+                s, p = run_test(m, "s", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"Bidirectional_{m}", s, p))
+        if algorithm == "c" or algorithm == "f":
+            if print_stats:
+                print(f"Frontier_{m}")
+                s, p = run_test(m, "f", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"Frontier_{m}", s, p))
+        if algorithm == "c" or algorithm == "n":
+            if print_stats:
+                print(f"ARA*_{m}")
+                s, p = run_test(m, "n", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"ARA*_{m}", s, p))
+        if algorithm == "c" or algorithm == "w":
+            if print_stats:
+                print(f"Beam_{m}")
+                s, p = run_test(m, "w", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"Beam_{m}", s, p))
+        if algorithm == "c" or algorithm == "m":
+            if print_stats:
+                print(f"SMA*_{m}")
+                s, p = run_test(m, "m", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"SMA*_{m}", s, p))
+        if algorithm == "c" or algorithm == "h":
+            if print_stats:
+                print(f"HPA*_{m}")
+                s, p = run_test(m, "h", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"HPA*_{m}", s, p))
+        if algorithm == "c" or algorithm == "p":
+            if print_stats:
+                print(f"ParallelBFS_{m}")
+                s, p = run_test(m, "p", print_stats, print_maze, cache_heuristic, use_landmarks, image_dir)
+            runs.append((f"ParallelBFS_{m}", s, p))
 
-    header = ["Run", "Memory", "Time", "Path Length", "Path"]
 
-    with open(filename, 'w') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(header)
-        csvwriter.writerows(stats)
+    store = ResultsStore(filename)
+    for run, s, p in runs:
+        name, _, m = run.rpartition("_")
+        store.append_run(run, ALGORITHMS[name], "maze", {"maze": int(m), "cache_heuristic": cache_heuristic,
+                                                        "use_landmarks": use_landmarks}, s, p)
 
@@ -1,5 +1,5 @@
 import numpy as np
-from shapes import *
+from MazeRender import maze_image, show_image
 
 
 def basic_maze():
@@ -99,36 +99,21 @@ def open_maze(size, start_loc, end_loc):
 
 
 def draw_maze(initial_state: np.ndarray, goal_state: np.ndarray):
+    """
+    Shows the maze in a window, tkinter is only imported when this is called
+    """
     w = 640
     h = 640
-    paper = Paper(w, h)
-    grid_size = min(int(h / initial_state.shape[0]), int(w / initial_state.shape[1]))
-    start = np.where(initial_state == 2)
-    goal = np.where(goal_state == 2)
-    for i in range(initial_state.shape[0]):
-        for j in range(initial_state.shape[1]):
-            r = Rectangle()
-            r.set_width(grid_size)
-            r.set_height(grid_size)
-            r.set_x(j * grid_size)
-            r.set_y(i * grid_size)
-            if i == start[0] and j == start[1]:
-                r.set_color("green")
-            elif i == goal[0] and j == goal[1]:
-                r.set_color("red")
-            elif initial_state[i][j] == 0: # impassable
-                r.set_color("black")
-            elif initial_state[i][j] == -1: # higher path cost
-                r.set_color("gray")
-            else:
-                r.set_color("white")
-            r.draw()
-    paper.display()
+    grid_size = max(1, min(int(h / initial_state.shape[0]), int(w / initial_state.shape[1])))
+    show_image(maze_image(initial_state, goal_state, scale=grid_size))
 
 
-if __name__ == '__main__':
-    maze_type = 11
-
+def numbered_maze(maze_type: int):
+    """
+    Returns one of the test mazes used by main.py
+    :param maze_type: number of the maze from 1 to NUM_MAZES
+    :return: initial and goal states as a list, both empty for an unknown number
+    """
     if maze_type == 1:
         initial_state, goal_state = basic_maze()
     elif maze_type == 2:
@@ -164,6 +149,16 @@ if __name__ == '__main__':
     else:
         initial_state = np.array([])
         goal_state = np.array([])
+    return [initial_state, goal_state]
+
+
+# number of mazes available through numbered_maze
+NUM_MAZES = 11
+
+
+if __name__ == '__main__':
+    maze_type = 11
+    initial_state, goal_state = numbered_maze(maze_type)
 
     if len(initial_state) != 0 and len(goal_state) != 0:
         draw_maze(initial_state, goal_state)
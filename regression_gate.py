@@ -0,0 +1,213 @@
+"""
+Performance regression gate. Runs a fixed set of searches and compares
+them with a stored baseline: nodes expanded and path length must match
+exactly, while wall time and peak memory are sampled several times and
+only count as a regression when the bootstrap confidence interval of
+current / baseline lies entirely above 1 + threshold.
+
+Usage:
+    python regression_gate.py record [--baseline FILE] [--repeats N]
+    python regression_gate.py check [--baseline FILE] [--repeats N] [--time-threshold F] [--memory-threshold F]
+
+Both commands take --corpus FILE [--band BAND] to add A* on every puzzle of
+a PuzzleCorpus band, whose path lengths are also checked against the known
+optimal lengths. check exits with status 1 when anything regressed or a
+baseline benchmark did not run, and with status 2 when there is no baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from InformedSearch import *
+from UninformedSearch import *
+from mazes import numbered_maze
+from ResultsStore import git_revision, machine
+from PuzzleCorpus import instance_problem, load_corpus, select
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# resamples used for the confidence intervals and the interval coverage
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+# fast searches are repeated until a time sample covers at least this many seconds
+MIN_SAMPLE_TIME = 0.05
+
+
+def _maze(maze_type: int) -> Callable[[], Problem]:
+    return lambda: MazeNavigation(*numbered_maze(maze_type))
+
+
+def _puzzle(heuristic: str = "manhattan") -> Callable[[], Problem]:
+    goal = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 0]])
+    hardest = np.array([[0, 8, 7], [6, 5, 4], [3, 2, 1]])
+    return lambda: SlidingPuzzle(hardest, goal, heuristic)
+
+
+# name -> (builds a fresh problem, search taking (problem, limits))
+BENCHMARKS: Dict[str, Tuple[Callable[[], Problem], Callable]] = {
+    "maze3_bfs": (_maze(3), breadth_first_search),
+    "maze7_bfs": (_maze(7), breadth_first_search),
+    "maze10_dfs": (_maze(10), depth_first_search),
+    "maze7_a_star": (_maze(7), a_star),
+    "maze11_a_star": (_maze(11), a_star),
+    "maze8_greedy": (_maze(8), greedy),
+    "puzzle_bfs": (_puzzle(), breadth_first_search),
+    "puzzle_a_star": (_puzzle(), a_star),
+    "puzzle_a_star_linear_conflict": (_puzzle("linear_conflict"), a_star),
+    "puzzle_greedy": (_puzzle(), greedy),
+}
+
+# known optimal path length of benchmarks added from a corpus
+OPTIMAL: Dict[str, int] = {}
+
+
+def add_corpus_benchmarks(filename: str, band: str = None) -> List[str]:
+    """
+    Adds an A* benchmark for every instance of a corpus band
+    :return: names of the benchmarks added
+    """
+    corpus = load_corpus(filename)
+    names = []
+    for instance in select(corpus, band):
+        name = f"corpus_{instance['id']}_a_star"
+        BENCHMARKS[name] = (lambda i=instance: instance_problem(corpus, i, "linear_conflict"), a_star)
+        OPTIMAL[name] = instance["optimal"]
+        names.append(name)
+    return names
+
+
+def run_benchmark(name: str, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Takes repeats samples of the wall time, each averaging as many untraced
+    runs as fit in MIN_SAMPLE_TIME, and repeats samples of the peak memory
+    under tracemalloc
+    :return: nodes expanded, path length and the lists of times and peaks
+    """
+    build, search = BENCHMARKS[name]
+    times, peaks = [], []
+    result = None
+    for _ in range(repeats):
+        runs, elapsed = 0, 0.0
+        while runs == 0 or elapsed < MIN_SAMPLE_TIME:
+            problem = build()
+            start = time.perf_counter()
+            result = search(problem, limits=SearchLimits())
+            elapsed += time.perf_counter() - start
+            runs += 1
+        times.append(elapsed / runs)
+    for _ in range(repeats):
+        problem = build()
+        tracemalloc.start()
+        search(problem, limits=SearchLimits())
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    measurement = {"nodes_expanded": result.nodes_expanded, "path_length": len(result), "status": result.status,
+                   "times": times, "memory": peaks}
+    if name in OPTIMAL:
+        measurement["optimal"] = OPTIMAL[name]
+    return measurement
+
+
+def ratio_interval(current: List[float], baseline: List[float], seed: int = 0) -> Tuple[float, float, float]:
+    """
+    Bootstrap confidence interval of median(current) / median(baseline).
+    Medians keep a few samples disturbed by other processes from deciding the verdict.
+    :return: ratio of the medians and the lower and upper end of the interval
+    """
+    rng = np.random.default_rng(seed)
+    current, baseline = np.asarray(current, dtype=float), np.asarray(baseline, dtype=float)
+    ratio = np.median(current) / np.median(baseline)
+    resampled = (np.median(rng.choice(current, (BOOTSTRAP_SAMPLES, len(current))), axis=1) /
+                 np.median(rng.choice(baseline, (BOOTSTRAP_SAMPLES, len(baseline))), axis=1))
+    tail = (1 - CONFIDENCE) / 2 * 100
+    low, high = np.percentile(resampled, [tail, 100 - tail])
+    return ratio, low, high
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], time_threshold: float,
+            memory_threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Compares the measurements of every benchmark with the baseline
+    :return: report lines and the names of the regressed measurements
+    """
+    lines, regressions = [], []
+    for name, now in current.items():
+        if "optimal" in now and now["path_length"] != now["optimal"]:
+            lines.append(f"{name}: path length {now['path_length']} is not the optimal {now['optimal']}")
+            regressions.append(f"{name}.optimal")
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"{name}: not in the baseline, skipped")
+            continue
+        for field in ("nodes_expanded", "path_length", "status"):
+            if now[field] != before[field]:
+                lines.append(f"{name}: {field} changed from {before[field]} to {now[field]}")
+                regressions.append(f"{name}.{field}")
+        for field, threshold in (("times", time_threshold), ("memory", memory_threshold)):
+            ratio, low, high = ratio_interval(now[field], before[field])
+            verdict = "ok"
+            if low > 1 + threshold:
+                verdict = "REGRESSED"
+                regressions.append(f"{name}.{field}")
+            elif high < 1 - threshold:
+                verdict = "improved"
+            lines.append(f"{name}: {field} x{ratio:.3f} [{low:.3f}, {high:.3f}] {verdict}")
+    for name in baseline:
+        if name not in current:
+            lines.append(f"{name}: in the baseline but did not run")
+            regressions.append(f"{name}.missing")
+    return lines, regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare search performance with a stored baseline")
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file to write or compare with")
+    parser.add_argument("--repeats", type=int, default=5, help="samples of time and of memory per benchmark")
+    parser.add_argument("--time-threshold", type=float, default=0.10, help="allowed relative slowdown")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="allowed relative memory growth")
+    parser.add_argument("--only", nargs="+", help="benchmarks to run, all by default")
+    parser.add_argument("--corpus", help="PuzzleCorpus file whose instances are added as benchmarks")
+    parser.add_argument("--band", help="difficulty band of the corpus to add, all bands by default")
+    args = parser.parse_args()
+    if args.corpus is not None:
+        add_corpus_benchmarks(args.corpus, args.band)
+    selected = args.only is not None
+    if args.only is None:
+        args.only = list(BENCHMARKS)
+    if args.command == "check" and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, record one first with python regression_gate.py record",
+              file=sys.stderr)
+        sys.exit(2)
+
+    measurements = {}
+    for benchmark in args.only:
+        print(f"Running {benchmark}", file=sys.stderr)
+        measurements[benchmark] = run_benchmark(benchmark, args.repeats)
+
+    if args.command == "record":
+        with open(args.baseline, "w") as f:
+            json.dump({"git": git_revision(), "machine": machine(), "benchmarks": measurements}, f, indent=1)
+        print(f"Baseline of {len(measurements)} benchmarks written to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        stored = json.load(f)
+    print(f"Baseline {stored['git']} on {stored['machine']['host']}, current {git_revision()} on {machine()['host']}")
+    baseline = stored["benchmarks"]
+    if selected:
+        # benchmarks left out with --only are not missing
+        baseline = {name: before for name, before in baseline.items() if name in args.only}
+    report, regressed = compare(measurements, baseline, args.time_threshold, args.memory_threshold)
+    print("\n".join(report))
+    if regressed:
+        print(f"{len(regressed)} regressions: {', '.join(regressed)}")
+        sys.exit(1)
+    print("No regressions")
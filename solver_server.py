@@ -0,0 +1,289 @@
+"""
+Long running solver daemon. Requests and responses are JSON objects, one per
+line, read from stdin and written to stdout or exchanged over a Unix socket.
+
+Example requests:
+    {"id": 1, "problem": "maze", "maze": 3, "algorithm": "a"}
+    {"id": 2, "problem": "maze", "initial": [[2, 1], [0, 1]], "goal": [[1, 1], [0, 2]], "algorithm": "b"}
+    {"id": 3, "problem": "puzzle", "initial": [[0, 8, 7], [6, 5, 4], [3, 2, 1]], "algorithm": "t"}
+
+Optional request fields are "goal" for puzzles (defaults to the solved board),
+"time_limit" in seconds and "max_nodes". Each response echoes the id and holds
+the status, path, nodes expanded, time spent searching and the latency from
+the moment the request was read until the response was written.
+
+Usage:
+    python solver_server.py [--socket PATH] [--workers N] [--batch-size N] [--batch-window SECONDS]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# problems and tables kept alive in each worker process
+_problems = {}
+_tables = {}
+SEARCHES = None
+MAX_CACHED_PROBLEMS = 128
+
+
+def _searches() -> dict:
+    """
+    Search functions by the letters used in main.py
+    """
+    from InformedSearch import a_star, greedy, ara_star
+    from UninformedSearch import (breadth_first_search, depth_first_search, bidirectional_search,
+                                  frontier_search, ranked_breadth_first_search)
+    return {
+        "b": breadth_first_search,
+        "d": depth_first_search,
+        "a": a_star,
+        "g": greedy,
+        "s": bidirectional_search,
+        "f": frontier_search,
+        "n": ara_star,
+        "r": ranked_breadth_first_search,
+    }
+
+
+def _init_worker():
+    """
+    Imports the search modules once per worker so requests only pay for searching
+    """
+    global SEARCHES
+    SEARCHES = _searches()
+
+
+def _puzzle_goal(size: int) -> np.ndarray:
+    goal_state = np.arange(1, size * size + 1).reshape((size, size))
+    goal_state[size - 1][size - 1] = 0
+    return goal_state
+
+
+def _get_problem(request: dict):
+    """
+    Returns the problem described by the request, reusing problems built
+    for earlier requests with the same states.
+    """
+    from Problem import MazeNavigation, SlidingPuzzle
+    from mazes import numbered_maze
+
+    kind = request.get("problem", "maze")
+    if kind == "maze" and "maze" in request:
+        key = ("maze", int(request["maze"]))
+        if key not in _problems:
+            initial_state, goal_state = numbered_maze(int(request["maze"]))
+            if len(initial_state) == 0:
+                raise ValueError(f"unknown maze {request['maze']}")
+            _problems[key] = MazeNavigation(initial_state, goal_state)
+        return _problems[key]
+
+    initial_state = np.array(request["initial"])
+    if "goal" in request:
+        goal_state = np.array(request["goal"])
+    elif kind == "puzzle":
+        goal_state = _puzzle_goal(initial_state.shape[0])
+    else:
+        raise ValueError("maze requests need a maze number or a goal")
+
+    key = (kind, initial_state.tobytes(), goal_state.tobytes(), initial_state.shape)
+    if key not in _problems:
+        if len(_problems) >= MAX_CACHED_PROBLEMS:
+            _problems.pop(next(iter(_problems)))
+        if kind == "maze":
+            _problems[key] = MazeNavigation(initial_state, goal_state)
+        elif kind == "puzzle":
+            _problems[key] = SlidingPuzzle(initial_state, goal_state)
+        else:
+            raise ValueError(f"unknown problem type {kind}")
+    return _problems[key]
+
+
+def solve(request: dict) -> dict:
+    """
+    Solves one request and returns the response without the latency
+    """
+    from SearchControl import SOLVED, SearchLimits, SearchResult
+
+    if SEARCHES is None:
+        _init_worker()
+    response = {"id": None}
+    try:
+        response["id"] = request.get("id")
+        problem = _get_problem(request)
+        algorithm = request.get("algorithm", "a")
+        limits = SearchLimits(time_limit=request.get("time_limit"), max_nodes=request.get("max_nodes"))
+        start = time.perf_counter()
+        if algorithm == "t":
+            from PuzzleTable import SolutionTable
+            key = problem.goal.tobytes()
+            if key not in _tables:
+                _tables[key] = SolutionTable(problem.goal)
+            path = SearchResult(_tables[key].solve(problem.initial), SOLVED, 0, 0.0)
+        elif algorithm in SEARCHES:
+            path = SEARCHES[algorithm](problem, limits=limits)
+        else:
+            raise ValueError(f"unknown algorithm {algorithm}")
+        response["search_time"] = time.perf_counter() - start
+        response["status"] = path.status
+        response["path"] = list(path)
+        response["nodes_expanded"] = path.nodes_expanded
+        if path.status != SOLVED:
+            response["best_so_far"] = path.best_so_far
+    except Exception as e:
+        response["status"] = "error"
+        response["error"] = f"{type(e).__name__}: {e}"
+    return response
+
+
+def solve_batch(requests: list) -> list:
+    """
+    Solves a batch of requests in one worker call
+    """
+    return [solve(request) for request in requests]
+
+
+class SolverServer:
+    """
+    Reads requests, groups the ones that arrive close together into batches
+    and dispatches each batch to a pool of worker processes.
+    """
+
+    def __init__(self, workers: int = None, batch_size: int = 8, batch_window: float = 0.002):
+        """
+        :param workers: number of worker processes, defaults to the number of cpus
+        :param batch_size: largest number of requests sent to a worker at once
+        :param batch_window: seconds to wait for more requests before sending a batch
+        """
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._pending = None
+        self._dispatching = set()
+
+    async def submit(self, request: dict) -> dict:
+        """
+        Queues a request and waits for its response
+        """
+        received = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((request, future))
+        response = await future
+        # responses of a batch that failed as a whole are built without reading the requests
+        response.setdefault("id", request.get("id"))
+        response["latency"] = time.perf_counter() - received
+        return response
+
+    async def _dispatch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        error = None
+        responses = []
+        try:
+            responses = await loop.run_in_executor(self._pool, solve_batch, [r for r, _ in batch])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            # every future is resolved, or the requests batched with a failing one would never be answered
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(responses[i] if i < len(responses) else
+                                      {"status": "error", "error": error or "no response from worker"})
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            close_at = loop.time() + self._batch_window
+            while len(batch) < self._batch_size:
+                timeout = close_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+
+    async def _handle_line(self, line: bytes, write):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            write({"status": "error", "error": f"invalid json: {e}"})
+            return
+        if not isinstance(request, dict):
+            write({"status": "error", "error": f"request must be a JSON object, not {type(request).__name__}"})
+            return
+        write(await self.submit(request))
+
+    async def _serve_stream(self, reader: asyncio.StreamReader, write):
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(self._handle_line(line, write))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_stdio(self):
+        """Serves requests from stdin until it is closed"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(response):
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+        await self._serve_stream(reader, write)
+
+    async def serve_socket(self, path: str):
+        """Serves requests from clients of a Unix socket until cancelled"""
+        async def client(reader, writer):
+            def write(response):
+                writer.write((json.dumps(response) + "\n").encode())
+
+            await self._serve_stream(reader, write)
+            await writer.drain()
+            writer.close()
+
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(client, path=path)
+        async with server:
+            await server.serve_forever()
+
+    async def run(self, socket_path: str = None):
+        """Starts the batcher and serves stdin or the socket"""
+        self._pending = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+        try:
+            if socket_path is None:
+                await self.serve_stdio()
+            else:
+                await self.serve_socket(socket_path)
+        finally:
+            batcher.cancel()
+            self._pool.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve search requests as JSON lines")
+    parser.add_argument("--socket", help="Unix socket path, stdin/stdout is used if omitted")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--batch-size", type=int, default=8, help="requests sent to a worker at once")
+    parser.add_argument("--batch-window", type=float, default=0.002, help="seconds to wait to fill a batch")
+    args = parser.parse_args()
+
+    server = SolverServer(args.workers, args.batch_size, args.batch_window)
+    asyncio.run(server.run(args.socket))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from InformedSearch import a_star
+from Problem import SlidingPuzzle
+from SearchCheckpoint import SearchCheckpoint
+from SearchControl import SearchLimits
+from UninformedSearch import breadth_first_search
+
+START = np.array([[8, 7, 6], [5, 4, 3], [2, 1, 0]])
+GOAL = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 0]])
+# two moves from START, reached by BFS well before it expands 50 nodes
+NEAR_GOAL = np.array([[8, 7, 6], [5, 0, 4], [2, 1, 3]])
+
+
+def _stopped(search, problem, filename):
+    """Runs a search until its node budget stops it, leaving a snapshot behind"""
+    limits = SearchLimits(max_nodes=50, checkpoint=SearchCheckpoint(str(filename)))
+    result = search(problem, limits=limits)
+    assert not result.solved
+    assert filename.exists()
+
+
+def test_resume_continues_the_same_search(tmp_path):
+    filename = tmp_path / "bfs.ckpt"
+    _stopped(breadth_first_search, SlidingPuzzle(START, GOAL), filename)
+    limits = SearchLimits(checkpoint=SearchCheckpoint(str(filename)))
+    result = breadth_first_search(SlidingPuzzle(START, GOAL), limits=limits)
+    assert result.solved
+    assert list(result) == breadth_first_search(SlidingPuzzle(START, GOAL))
+    assert not filename.exists()
+
+
+def test_resume_rejects_another_goal(tmp_path):
+    filename = tmp_path / "bfs.ckpt"
+    _stopped(breadth_first_search, SlidingPuzzle(START, GOAL), filename)
+    assert breadth_first_search(SlidingPuzzle(START, NEAR_GOAL)) == ["north", "west"]
+    limits = SearchLimits(checkpoint=SearchCheckpoint(str(filename)))
+    with pytest.raises(ValueError, match="goal"):
+        breadth_first_search(SlidingPuzzle(START, NEAR_GOAL), limits=limits)
+
+
+def test_resume_rejects_another_heuristic(tmp_path):
+    filename = tmp_path / "a_star.ckpt"
+    _stopped(a_star, SlidingPuzzle(START, GOAL, "manhattan"), filename)
+    limits = SearchLimits(checkpoint=SearchCheckpoint(str(filename)))
+    with pytest.raises(ValueError, match="heuristic"):
+        a_star(SlidingPuzzle(START, GOAL, "linear_conflict"), limits=limits)